@@ -2,7 +2,17 @@
 
 from __future__ import annotations
 
-from doc8.main import doc8  # noqa
 from doc8.version import __version__
 
 __all__ = ("__version__",)
+
+
+def __getattr__(name):
+    # Importing ``doc8.main`` (and docutils with it) is deferred until the API
+    # is used, so that light modules (like the daemon client) start quickly.
+    if name in {"doc8", "lint_text"}:
+        # pylint: disable=import-outside-toplevel
+        from doc8 import main  # noqa: PLC0415
+
+        return getattr(main, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
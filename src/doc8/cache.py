@@ -0,0 +1,169 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""On-disk cache of check results.
+
+Entries are keyed by the content of a file, the configuration that affects
+the checks and the doc8 version. Each entry records the errors found by every
+check that ran together with the version of that check, so that adding (or
+upgrading) a plugin only re-runs the checks that changed.
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from doc8 import utils, version
+
+inspect = utils.lazy_import("inspect")
+
+LOG = logging.getLogger(__name__)
+
+# Configuration options that change what the checks report.
+KEY_OPTIONS = ("max_line_length", "allow_long_titles", "sphinx")
+
+
+def source_version(check_cls):
+    """Returns the size and modification time of the module of a class.
+
+    ``None`` is returned when that module is not a file.
+    """
+    try:
+        stat = os.stat(inspect.getfile(check_cls))
+    except (OSError, TypeError):
+        return None
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def check_version(check):
+    """Returns a string identifying the version of a check.
+
+    Checks may define a ``VERSION`` attribute, when they do not the size and
+    modification time of the module that defines them is used instead.
+    """
+    value = getattr(check, "VERSION", None)
+    if value is not None:
+        return str(value)
+    return source_version(check.__class__) or version.__version__
+
+
+class ResultCache:
+    ENTRY_SUFFIX = ".json"
+
+    def __init__(self, cache_dir, cfg, max_size=None):
+        self._cache_dir = cache_dir
+        self._max_size = max_size
+        self._options = {k: cfg.get(k) for k in KEY_OPTIONS}
+
+    @classmethod
+    def from_config(cls, cfg):
+        """Returns the cache configured by ``cfg`` (or none if disabled)."""
+        cache_dir = cfg.get("cache_dir")
+        if not cache_dir or not cfg.get("cache", True):
+            return None
+        max_size = cfg.get("cache_max_size")
+        if max_size:
+            max_size = max_size * 1024 * 1024
+        return cls(os.path.abspath(cache_dir), cfg, max_size=max_size)
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    def key(self, parsed_file, ignoreables):
+        key_data = {
+            "digest": parsed_file.digest,
+            "extension": parsed_file.extension,
+            "encoding": parsed_file.encoding,
+            "ignore": sorted(ignoreables),
+            "options": self._options,
+            "version": version.__version__,
+        }
+        blob = json.dumps(key_data, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(blob).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self._cache_dir, key[:2], key + self.ENTRY_SUFFIX)
+
+    def load(self, key):
+        """Returns ``{check_name: (check_version, errors)}`` for ``key``."""
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return {}
+        with contextlib.suppress(OSError):
+            # Keep track of usage, eviction removes the least recently used.
+            os.utime(path)
+        entry = {}
+        try:
+            for check_name, (version_id, errors) in data.items():
+                entry[check_name] = (
+                    version_id,
+                    [tuple(error) for error in errors],
+                )
+        except (AttributeError, TypeError, ValueError):
+            LOG.debug("Ignoring malformed cache entry %s", path)
+            return {}
+        return entry
+
+    def store(self, key, entry):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(path),
+                suffix=".tmp",
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(entry, fh)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            LOG.debug("Unable to write cache entry %s: %s", path, e)
+
+    def prune(self):
+        """Evicts the least recently used entries above the size limit."""
+        if not self._max_size:
+            return
+        entries = []
+        total_size = 0
+        try:
+            buckets = os.scandir(self._cache_dir)
+        except OSError:
+            return
+        with buckets:
+            for bucket in buckets:
+                if not bucket.is_dir(follow_symlinks=False):
+                    continue
+                with os.scandir(bucket.path) as it:
+                    for entry in it:
+                        if not entry.name.endswith(self.ENTRY_SUFFIX):
+                            continue
+                        try:
+                            stat = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                        total_size += stat.st_size
+        if total_size <= self._max_size:
+            return
+        entries.sort()
+        for _mtime, size, path in entries:
+            with contextlib.suppress(OSError):
+                os.unlink(path)
+                total_size -= size
+            if total_size <= self._max_size:
+                break
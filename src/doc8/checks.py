@@ -13,15 +13,21 @@
 # under the License.
 
 import abc
-import collections
+import bisect
 import re
 
-from docutils import nodes as docutils_nodes
+from doc8 import parser, utils
 
-from doc8 import utils
+docutils_nodes = utils.lazy_import("docutils.nodes")
 
 
 class ContentCheck(abc.ABC):
+    # What the check uses from the parsed file (see ``parser.ARTIFACTS``),
+    # content checks may use any of them unless they tell otherwise. Checks
+    # may also define ``used_artifacts(parsed_file)`` to narrow them down
+    # for a given file.
+    ARTIFACTS = frozenset(parser.ARTIFACTS)
+
     def __init__(self, cfg):
         self._cfg = cfg
 
@@ -31,6 +37,8 @@ class ContentCheck(abc.ABC):
 
 
 class LineCheck(abc.ABC):
+    ARTIFACTS = frozenset(["lines"])
+
     def __init__(self, cfg):
         self._cfg = cfg
 
@@ -39,50 +47,82 @@ class LineCheck(abc.ABC):
         pass
 
 
-class CheckTrailingWhitespace(LineCheck):
-    _TRAILING_WHITESPACE_REGEX = re.compile(r"\s$")
+class BufferCheck(abc.ABC):
+    """Check that searches the whole contents of a file at once.
+
+    The contents are given as UTF-8 encoded bytes (files using another
+    encoding are converted first) and the problems found are reported as
+    ``(offset, code, message)`` tuples, the offset being mapped to the line
+    it is part of.
+    """
+
+    ARTIFACTS = frozenset(["buffer"])
+
+    def __init__(self, cfg):
+        self._cfg = cfg
+
+    @abc.abstractmethod
+    def report_iter(self, buffer):
+        pass
+
+
+# Whitespace characters (as matched by ``\s`` in text) that can be part of a
+# line, other than the tabulation, encoded as UTF-8.
+_WHITESPACE_NO_TAB = (
+    rb"[\x0b\x0c\x1c-\x1f ]"
+    rb"|\xc2[\x85\xa0]"
+    rb"|\xe1\x9a\x80"
+    rb"|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]"
+    rb"|\xe2\x81\x9f"
+    rb"|\xe3\x80\x80"
+)
+
+
+class CheckTrailingWhitespace(BufferCheck):
+    _TRAILING_WHITESPACE_REGEX = re.compile(
+        rb"(?:\t|" + _WHITESPACE_NO_TAB + rb")(?=[\r\n]|\Z)",
+    )
     REPORTS = frozenset(["D002"])
 
-    def report_iter(self, line):
-        if self._TRAILING_WHITESPACE_REGEX.search(line):
-            yield ("D002", "Trailing whitespace")
+    def report_iter(self, buffer):
+        for match in self._TRAILING_WHITESPACE_REGEX.finditer(buffer):
+            yield (match.start(), "D002", "Trailing whitespace")
 
 
-class CheckIndentationNoTab(LineCheck):
-    _STARTING_WHITESPACE_REGEX = re.compile(r"^(\s+)")
+class CheckIndentationNoTab(BufferCheck):
+    _STARTING_TAB_REGEX = re.compile(
+        rb"(?<![^\r\n])(?:" + _WHITESPACE_NO_TAB + rb")*\t",
+    )
     REPORTS = frozenset(["D003"])
 
-    def report_iter(self, line):
-        match = self._STARTING_WHITESPACE_REGEX.search(line)
-        if match:
-            spaces = match.group(1)
-            if "\t" in spaces:
-                yield ("D003", "Tabulation used for indentation")
+    def report_iter(self, buffer):
+        for match in self._STARTING_TAB_REGEX.finditer(buffer):
+            yield (match.start(), "D003", "Tabulation used for indentation")
 
 
-class CheckCarriageReturn(ContentCheck):
+class CheckCarriageReturn(BufferCheck):
+    _CARRIAGE_RETURN_REGEX = re.compile(rb"\r")
     REPORTS = frozenset(["D004"])
 
-    def report_iter(self, parsed_file):
-        for i, line in enumerate(parsed_file.lines):
-            if b"\r" in line:
-                yield (i + 1, "D004", "Found literal carriage return")
+    def report_iter(self, buffer):
+        # A carriage return always ends the line it is part of.
+        for match in self._CARRIAGE_RETURN_REGEX.finditer(buffer):
+            yield (match.start(), "D004", "Found literal carriage return")
 
 
-class CheckNewlineEndOfFile(ContentCheck):
+class CheckNewlineEndOfFile(BufferCheck):
+    _LAST_CHARACTER_REGEX = re.compile(rb"[^\r\n]\Z")
     REPORTS = frozenset(["D005"])
 
-    def report_iter(self, parsed_file):
-        # pylint: disable=protected-access
-        if parsed_file.lines and not (
-            parsed_file.lines[-1].endswith(b"\n")
-            or parsed_file._lines[-1].endswith(b"\r")
-        ):
-            yield (len(parsed_file.lines), "D005", "No newline at end of file")
+    def report_iter(self, buffer):
+        match = self._LAST_CHARACTER_REGEX.search(buffer)
+        if match:
+            yield (match.start(), "D005", "No newline at end of file")
 
 
 class CheckValidity(ContentCheck):
     REPORTS = frozenset(["D000"])
+    ARTIFACTS = frozenset(["errors"])
     EXT_MATCHER = re.compile(r"(.*)[.]rst", re.IGNORECASE)
 
     # From docutils docs:
@@ -143,11 +183,22 @@ class CheckValidity(ContentCheck):
 
 class CheckMaxLineLength(ContentCheck):
     REPORTS = frozenset(["D001"])
+    ARTIFACTS = frozenset(["lines", "document"])
+
+    _DIRECTIVE_REGEX = re.compile(r"^\s*..\s(.*?)::\s*")
+    _LITERAL_REGEX = re.compile(r"^::\s*$")
+    _LIST_REGEX = re.compile(r"^\s*(\* |- |#\. |\d+\. )")
+    _INDENT_REGEX = re.compile(r"\s*")
 
     def __init__(self, cfg):
         super().__init__(cfg)
         self._max_line_length = self._cfg["max_line_length"]
         self._allow_long_titles = self._cfg["allow_long_titles"]
+        # Lines have at least as many bytes as characters, so no line can be
+        # too long when no run of bytes (between newlines) is.
+        self._long_line_regex = re.compile(
+            rb"[^\r\n]{%d}" % (self._max_line_length + 1),
+        )
 
     def _extract_node_lines(self, doc):
         def extract_lines(node, start_line):
@@ -161,85 +212,107 @@ class CheckMaxLineLength(ContentCheck):
                 lines.append(end)
             return lines
 
-        def gather_lines(node):
-            lines = []
-            for n in node.findall(include_self=True):
-                lines.extend(extract_lines(n, find_line(n)))
-            return lines
-
-        def find_line(node):
-            n = node
-            while n is not None:
-                if n.line is not None:
-                    return n.line
-                n = n.parent
-            return None
-
-        def filter_systems(node):
-            if utils.has_any_node_type(node, (docutils_nodes.system_message,)):
-                return False
-            return True
+        # Walk the tree once (in the same pre-order as ``findall``) working
+        # out the line of every node from its closest ancestor that has one
+        # and whether it is part of a system message.
+        order = []
+        parents = []
+        lines = []
+        in_systems = []
+        stack = [(doc, -1)]
+        while stack:
+            node, parent = stack.pop()
+            position = len(order)
+            line = node.line
+            if line is None and parent != -1:
+                line = lines[parent]
+            in_system = isinstance(node, docutils_nodes.system_message) or (
+                parent != -1 and in_systems[parent]
+            )
+            order.append(node)
+            parents.append(parent)
+            lines.append(line)
+            in_systems.append(in_system)
+            stack.extend((child, position) for child in reversed(node.children))
+
+        # Then gather the lines contained in every subtree in one post-order
+        # pass, each node adding its own span to the one of its parent.
+        spans = [None] * len(order)
+        for position in range(len(order) - 1, -1, -1):
+            line = lines[position]
+            if line is None:
+                continue
+            own_lines = extract_lines(order[position], line)
+            span = spans[position]
+            if span is None:
+                span = (min(own_lines), max(own_lines))
+            else:
+                span = (min(span[0], *own_lines), max(span[1], *own_lines))
+            spans[position] = span
+            parent = parents[position]
+            if parent != -1:
+                parent_span = spans[parent]
+                if parent_span is None:
+                    spans[parent] = span
+                else:
+                    spans[parent] = (
+                        min(parent_span[0], span[0]),
+                        max(parent_span[1], span[1]),
+                    )
 
         nodes_lines = []
         first_line = -1
-        for n in utils.filtered_traverse(doc, filter_systems):
-            line = find_line(n)
-            if line is None:
+        for position, node in enumerate(order):
+            line = lines[position]
+            if line is None or in_systems[position]:
                 continue
             if first_line == -1:
                 first_line = line
-            contained_lines = set(gather_lines(n))
-            nodes_lines.append((n, (min(contained_lines), max(contained_lines))))
+            nodes_lines.append((node, spans[position]))
         return (nodes_lines, first_line)
 
     def _extract_directives(self, lines):
-        def starting_whitespace(line):
-            m = re.match(r"^(\s+)(.*)$", line)
-            if not m:
-                return 0
-            return len(m.group(1))
-
-        def all_whitespace(line):
-            return bool(re.match(r"^(\s*)$", line))
-
-        def find_directive_end(start, lines):
-            after_lines = collections.deque(lines[start + 1 :])
-            k = 0
-            while after_lines:
-                line = after_lines.popleft()
-                if all_whitespace(line) or starting_whitespace(line) >= 1:
-                    k += 1
-                else:
-                    break
-            return start + k
+        """Returns the sorted (and merged) regions of directives and terms.
 
+        Each region is a ``(start, end)`` tuple of (inclusive) line indexes.
+        """
         # Find where directives start & end so that we can exclude content in
         # these directive regions (the rst parser may not handle this correctly
-        # for unknown directives, so we have to do it manually).
-        directives = []
+        # for unknown directives, so we have to do it manually). A directive
+        # lasts as long as the lines that follow it are blank or indented.
+        #
+        # Definition terms in definition lists are also found (this may match
+        # the code, which is already part of a directive region).
+        regions = []
+        in_directive = False
+
+        def add_region(i):
+            if regions and regions[-1][1] >= i - 1:
+                regions[-1] = (regions[-1][0], i)
+            else:
+                regions.append((i, i))
+
+        indents = [self._INDENT_REGEX.match(line).end() for line in lines]
         for i, line in enumerate(lines):
-            if re.match(r"^\s*..\s(.*?)::\s*", line) or re.match(r"^::\s*$", line):
-                directives.append((i, find_directive_end(i, lines)))
-
-        # Find definition terms in definition lists
-        # This check may match the code, which is already appended
-        lwhitespaces = r"^\s*"
-        listspattern = r"^\s*(\* |- |#\. |\d+\. )"
-        for i in range(len(lines) - 1):
-            line = lines[i]
-            next_line = lines[i + 1]
+            indent = indents[i]
+            blank = indent == len(line)
+            if in_directive:
+                in_directive = blank or indent >= 1
+                if in_directive:
+                    add_region(i)
+            if self._DIRECTIVE_REGEX.match(line) or self._LITERAL_REGEX.match(line):
+                add_region(i)
+                in_directive = True
             # if line is a blank, line is not a definition term
-            if all_whitespace(line):
-                continue
             # if line is a list, line is checked as normal line
-            if re.match(listspattern, line):
-                continue
-            if len(re.search(lwhitespaces, line).group()) < len(
-                re.search(lwhitespaces, next_line).group(),
+            if (
+                not blank
+                and i + 1 < len(lines)
+                and indent < indents[i + 1]
+                and not self._LIST_REGEX.match(line)
             ):
-                directives.append((i, i))
-
-        return directives
+                add_region(i)
+        return regions
 
     def _txt_checker(self, parsed_file):
         for i, line in enumerate(parsed_file.lines_iter()):
@@ -247,29 +320,24 @@ class CheckMaxLineLength(ContentCheck):
                 if not utils.contains_url(line):
                     yield (i + 1, "D001", "Line too long")
 
-    def _rst_checker(self, parsed_file):
-        lines = list(parsed_file.lines_iter())
-        doc = parsed_file.document
+    def _node_finder(self, doc):
         nodes_lines, first_line = self._extract_node_lines(doc)
-        directives = self._extract_directives(lines)
+        node_index = utils.NodeSpanIndex(nodes_lines)
 
         def find_containing_nodes(num):
             if num < first_line and nodes_lines:
                 return [nodes_lines[0][0]]
-            contained_in = []
-            for n, (line_min, line_max) in nodes_lines:
-                if line_min <= num <= line_max:
-                    contained_in.append((n, (line_min, line_max)))
-            smallest_span = None
-            best_nodes = []
-            for n, (line_min, line_max) in contained_in:
-                span = line_max - line_min
-                if smallest_span is None or span < smallest_span:
-                    smallest_span = span
-                    best_nodes = [n]
-                elif span == smallest_span:
-                    best_nodes.append(n)
-            return best_nodes
+            return node_index.smallest_spanning(num)
+
+        return find_containing_nodes
+
+    def _rst_checker(self, parsed_file):
+        lines = list(parsed_file.lines_iter())
+        directives = self._extract_directives(lines)
+        directive_starts = [start for start, _end in directives]
+        # The doctree is only built (which is expensive) once a line that may
+        # have to be reported is found, most files do not have any.
+        find_containing_nodes = None
 
         def any_types(nodes, types):
             # pylint: disable=use-a-generator
@@ -283,12 +351,9 @@ class CheckMaxLineLength(ContentCheck):
         )
         for i, line in enumerate(lines):
             if len(line) > self._max_line_length:
-                in_directive = False
-                for start, end in directives:
-                    if start <= i <= end:
-                        in_directive = True
-                        break
-                if in_directive:
+                region = bisect.bisect_right(directive_starts, i) - 1
+                if region >= 0 and i <= directives[region][1]:
+                    # In a directive region (or a definition term).
                     continue
                 stripped = line.lstrip()
                 if " " not in stripped:
@@ -296,6 +361,8 @@ class CheckMaxLineLength(ContentCheck):
                     continue
                 if utils.contains_url(stripped):
                     continue
+                if find_containing_nodes is None:
+                    find_containing_nodes = self._node_finder(parsed_file.document)
                 nodes = find_containing_nodes(i + 1)
                 if any_types(nodes, skip_types):
                     continue
@@ -303,6 +370,17 @@ class CheckMaxLineLength(ContentCheck):
                     continue
                 yield (i + 1, "D001", "Line too long")
 
+    def used_artifacts(self, parsed_file):
+        """Returns which of the ``ARTIFACTS`` are used for ``parsed_file``.
+
+        The document is only used (for rst files) to look at long lines.
+        """
+        if parsed_file.extension.lower() != ".rst" or not (
+            self._long_line_regex.search(parsed_file.buffer)
+        ):
+            return frozenset(["lines"])
+        return self.ARTIFACTS
+
     def report_iter(self, parsed_file):
         if parsed_file.extension.lower() != ".rst":
             checker_func = self._txt_checker
@@ -0,0 +1,247 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Resident doc8 process, and its client, talking over a Unix socket.
+
+``doc8 --daemon`` keeps the interpreter (with docutils and the checks
+imported) and the check plans warm, ``doc8-client`` sends it its command
+line and working directory (along with the document to read from the
+standard input, if any) and prints what a run of ``doc8`` with them would
+have printed. Every request and response is a single line of JSON.
+
+This module only depends on the standard library so that the client starts
+quickly, the client runs doc8 itself when no daemon is listening.
+"""
+
+import base64
+import contextlib
+import io
+import json
+import logging
+import os
+import socket
+import sys
+import tempfile
+import traceback
+
+LOG = logging.getLogger(__name__)
+
+SOCKET_ENV = "DOC8_SOCKET"
+# Options that make no sense through the daemon, the client runs doc8 itself
+# when given one of them.
+LOCAL_OPTIONS = frozenset([
+    "--daemon",
+    "--lsp",
+    "--watch",
+    "--version",
+    "-h",
+    "--help",
+])
+# The path that stands for the standard input, which the client sends.
+STDIN_PATH = "-"
+
+
+def default_socket_path():
+    path = os.environ.get(SOCKET_ENV)
+    if path:
+        return path
+    directory = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    name = "doc8-%s.sock" % os.getuid() if hasattr(os, "getuid") else "doc8.sock"
+    return os.path.join(directory, name)
+
+
+def _recv_line(conn):
+    chunks = []
+    while True:
+        chunk = conn.recv(64 * 1024)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith(b"\n"):
+            break
+    return b"".join(chunks)
+
+
+def _send_line(conn, data):
+    conn.sendall(json.dumps(data).encode("utf-8") + b"\n")
+
+
+def _is_listening(socket_path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+
+def _listen(socket_path):
+    if not hasattr(socket, "AF_UNIX"):
+        msg = "Unix sockets are not available on this platform"
+        raise OSError(msg)
+    if os.path.exists(socket_path):
+        if _is_listening(socket_path):
+            raise OSError("A doc8 daemon is already listening on %s" % socket_path)
+        # Left behind by a daemon that did not exit cleanly.
+        os.unlink(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Only the user running the daemon may connect to it.
+    umask = os.umask(0o177)
+    try:
+        server.bind(socket_path)
+    except BaseException:
+        server.close()
+        raise
+    finally:
+        os.umask(umask)
+    server.listen()
+    return server
+
+
+@contextlib.contextmanager
+def _redirect_stdin(stream):
+    saved = sys.stdin
+    sys.stdin = stream
+    try:
+        yield stream
+    finally:
+        sys.stdin = saved
+
+
+def _run(run, argv, stdin, stdout, stderr):
+    with (
+        _redirect_stdin(stdin),
+        contextlib.redirect_stdout(stdout),
+        contextlib.redirect_stderr(stderr),
+    ):
+        try:
+            status = run(argv)
+        except SystemExit as e:
+            status = e.code
+        except Exception:  # pylint: disable=broad-except
+            # Reported like an uncaught exception of a doc8 run.
+            traceback.print_exc()
+            status = 1
+    if status is None:
+        return 0
+    if not isinstance(status, int):
+        # Like ``sys.exit(message)``.
+        stderr.write("%s\n" % status)
+        return 1
+    return status
+
+
+def handle(message, run):
+    """Runs ``run(argv)`` as ``message`` requests and returns the response."""
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    cwd = os.getcwd()
+    try:
+        # The standard input of the daemon is never read.
+        data = base64.b64decode(message.get("stdin", ""), validate=True)
+        stdin = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8")
+        os.chdir(message["cwd"])
+        status = _run(run, list(message["argv"]), stdin, stdout, stderr)
+    except (KeyError, TypeError, ValueError, OSError) as e:
+        stderr.write("doc8: invalid request: %s\n" % e)
+        status = 2
+    finally:
+        os.chdir(cwd)
+    return {"status": status, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+def serve(socket_path, run):
+    """Serves the requests of the clients until interrupted.
+
+    Requests are ``{"argv": [...], "cwd": "...", "stdin": "..."}`` objects
+    (``stdin`` being the optional base64 encoded contents of the standard
+    input), they are served one at a time by calling ``run(argv)`` from
+    ``cwd``.
+    """
+    server = _listen(socket_path)
+    LOG.info("Listening on %s", socket_path)
+    try:
+        while True:
+            conn, _address = server.accept()
+            with conn:
+                _serve_connection(conn, run)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        with contextlib.suppress(OSError):
+            os.unlink(socket_path)
+    return 0
+
+
+def _serve_connection(conn, run):
+    try:
+        message = json.loads(_recv_line(conn))
+    except ValueError as e:
+        response = {"status": 2, "stdout": "", "stderr": "%s\n" % e}
+    else:
+        response = handle(message, run)
+    with contextlib.suppress(OSError):
+        _send_line(conn, response)
+
+
+def request(socket_path, argv, cwd=None, stdin=None):
+    """Sends ``argv`` to the daemon and returns its response.
+
+    The contents of the (binary) ``stdin`` stream are sent along when it is
+    given, it is only read once connected. ``None`` is returned when no
+    daemon is listening on ``socket_path``.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(socket_path)
+        except OSError:
+            return None
+        data = {"argv": argv, "cwd": cwd or os.getcwd()}
+        if stdin is not None:
+            data["stdin"] = base64.b64encode(stdin.read()).decode("ascii")
+        _send_line(client, data)
+        return json.loads(_recv_line(client))
+
+
+def _socket_option(argv):
+    for i, arg in enumerate(argv):
+        if arg == "--socket" and i + 1 < len(argv):
+            return argv[i + 1]
+        if arg.startswith("--socket="):
+            return arg.split("=", 1)[1]
+    return None
+
+
+def client_main(argv=None):
+    """Entry point of ``doc8-client``, which takes the options of ``doc8``."""
+    if argv is None:
+        argv = sys.argv[1:]
+    response = None
+    if not LOCAL_OPTIONS.intersection(argv):
+        socket_path = _socket_option(argv) or default_socket_path()
+        stdin = sys.stdin.buffer if STDIN_PATH in argv else None
+        response = request(socket_path, argv, stdin=stdin)
+    if response is None:
+        # pylint: disable=import-outside-toplevel
+        from doc8 import main  # noqa: PLC0415
+
+        return main.main(argv)
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return response["status"]
+
+
+if __name__ == "__main__":
+    sys.exit(client_main())
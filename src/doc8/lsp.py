@@ -0,0 +1,335 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Language server (over stdio) publishing the errors of open documents.
+
+The documents are kept in sync incrementally and validated from memory, a
+document is only validated once it did not change for a short while, and
+its errors are dropped when it changed while it was being validated.
+"""
+
+import json
+import logging
+import queue
+import re
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+from doc8 import version
+
+LOG = logging.getLogger(__name__)
+
+# Seconds a document must not change for before it is validated.
+DEBOUNCE_DELAY = 0.2
+
+# Text document sync kinds.
+SYNC_INCREMENTAL = 2
+# Diagnostic severities.
+SEVERITY_ERROR = 1
+SEVERITY_WARNING = 2
+# Error codes.
+METHOD_NOT_FOUND = -32601
+INVALID_REQUEST = -32600
+
+LINE_BREAK_REGEX = re.compile(r"\r\n|\r|\n")
+# Characters above it take two UTF-16 code units (a surrogate pair).
+MAX_BMP_CHARACTER = 0xFFFF
+
+
+def read_message(stream):
+    """Reads a message (``None`` at the end of the ``stream``)."""
+    length = None
+    while True:
+        line = stream.readline()
+        if not line:
+            return None
+        line = line.strip()
+        if not line:
+            break
+        name, _sep, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value)
+    if length is None:
+        msg = "Message without a Content-Length header"
+        raise ValueError(msg)
+    body = b""
+    while len(body) < length:
+        # Unbuffered streams may return less than asked for.
+        chunk = stream.read(length - len(body))
+        if not chunk:
+            return None
+        body += chunk
+    return json.loads(body)
+
+
+def write_message(stream, message):
+    body = json.dumps(message).encode("utf-8")
+    stream.write(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+    stream.flush()
+
+
+def _utf16_length(text):
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _utf16_index(line, character):
+    # Index in ``line`` of the (UTF-16 code unit based) ``character``.
+    units = 0
+    for i, c in enumerate(line):
+        if units >= character:
+            return i
+        units += 2 if ord(c) > MAX_BMP_CHARACTER else 1
+    return len(line)
+
+
+def _line_starts(text):
+    starts = [0]
+    starts.extend(match.end() for match in LINE_BREAK_REGEX.finditer(text))
+    return starts
+
+
+def _line_end(text, starts, line):
+    end = starts[line + 1] if line + 1 < len(starts) else len(text)
+    match = LINE_BREAK_REGEX.search(text, starts[line], end)
+    return match.start() if match else end
+
+
+def position_offset(text, starts, position):
+    """Returns the offset in ``text`` of a (line, character) ``position``."""
+    line = position["line"]
+    if line >= len(starts):
+        return len(text)
+    start = starts[line]
+    end = _line_end(text, starts, line)
+    return start + _utf16_index(text[start:end], position["character"])
+
+
+def apply_change(text, change):
+    """Returns ``text`` once a ``didChange`` content change is applied."""
+    change_range = change.get("range")
+    if change_range is None:
+        return change["text"]
+    starts = _line_starts(text)
+    start = position_offset(text, starts, change_range["start"])
+    end = position_offset(text, starts, change_range["end"])
+    return text[:start] + change["text"] + text[end:]
+
+
+def uri_to_path(uri):
+    """Returns the path of a ``file:`` URI (or ``None`` for others)."""
+    parsed = urllib.parse.urlparse(uri)
+    if parsed.scheme != "file":
+        return None
+    path = parsed.path
+    if parsed.netloc:
+        path = f"//{parsed.netloc}{path}"
+    return urllib.request.url2pathname(path)
+
+
+class Document:
+    def __init__(self, uri, text, doc_version):
+        self.uri = uri
+        self.path = uri_to_path(uri)
+        self.text = text
+        self.version = doc_version
+        # When the document is due for validation, or ``None``.
+        self.due = None
+
+
+class LanguageServer:
+    """Serves a client over ``stdin``/``stdout`` (binary streams).
+
+    ``lint(path, text)`` returns the ``(line_num, code, message)`` errors
+    of a document, or ``None`` when the document is not to be checked.
+    """
+
+    def __init__(self, lint, delay=DEBOUNCE_DELAY):
+        self._lint = lint
+        self._delay = delay
+        self._documents = {}
+        self._messages = queue.Queue()
+        self._stdout = None
+        self._shutdown = False
+        self._exit_code = None
+
+    def _read(self, stdin):
+        try:
+            while True:
+                message = read_message(stdin)
+                self._messages.put(message)
+                if message is None:
+                    return
+        except (OSError, ValueError):
+            LOG.exception("Unable to read a message")
+            self._messages.put(None)
+
+    def serve(self, stdin, stdout):
+        """Serves the client until it exits, returns the exit code."""
+        self._stdout = stdout
+        reader = threading.Thread(target=self._read, args=(stdin,), daemon=True)
+        reader.start()
+        while self._exit_code is None:
+            due = [doc.due for doc in self._documents.values() if doc.due is not None]
+            timeout = max(0.0, min(due) - time.monotonic()) if due else None
+            try:
+                message = self._messages.get(timeout=timeout)
+            except queue.Empty:
+                self._validate_due()
+                continue
+            self._dispatch(message)
+        return self._exit_code
+
+    def _process_pending(self):
+        while self._exit_code is None:
+            try:
+                message = self._messages.get_nowait()
+            except queue.Empty:
+                return
+            self._dispatch(message)
+
+    def _validate_due(self):
+        now = time.monotonic()
+        for doc in list(self._documents.values()):
+            if doc.due is None or doc.due > now:
+                continue
+            # Changes received in the meantime delay the validation.
+            self._process_pending()
+            if doc.due is None or doc.due > now or self._exit_code is not None:
+                continue
+            doc.due = None
+            try:
+                errors = self._lint(doc.path, doc.text) if doc.path else None
+            except Exception:  # pylint: disable=broad-except
+                # Like a document without errors, the server keeps serving.
+                LOG.exception("Unable to validate %s", doc.uri)
+                errors = None
+            self._process_pending()
+            if self._documents.get(doc.uri) is not doc or doc.due is not None:
+                # Stale, the new contents are validated instead.
+                continue
+            self._publish(doc, errors or [])
+
+    def _publish(self, doc, errors):
+        lines = LINE_BREAK_REGEX.split(doc.text)
+        diagnostics = []
+        for line_num, code, message in errors:
+            line = line_num - 1 if isinstance(line_num, int) else 0
+            line = min(max(line, 0), len(lines) - 1)
+            text = lines[line]
+            diagnostics.append({
+                "range": {
+                    "start": {"line": line, "character": 0},
+                    "end": {"line": line, "character": _utf16_length(text)},
+                },
+                "severity": SEVERITY_ERROR if code == "D000" else SEVERITY_WARNING,
+                "code": code,
+                "source": "doc8",
+                "message": message,
+            })
+        self._notify(
+            "textDocument/publishDiagnostics",
+            {"uri": doc.uri, "version": doc.version, "diagnostics": diagnostics},
+        )
+
+    def _notify(self, method, params):
+        write_message(
+            self._stdout,
+            {"jsonrpc": "2.0", "method": method, "params": params},
+        )
+
+    def _respond(self, message_id, result=None, error=None):
+        response = {"jsonrpc": "2.0", "id": message_id}
+        if error is not None:
+            response["error"] = error
+        else:
+            response["result"] = result
+        write_message(self._stdout, response)
+
+    def _schedule(self, doc):
+        doc.due = time.monotonic() + self._delay
+
+    def _dispatch(self, message):
+        if message is None:
+            # The client went away without asking the server to exit.
+            self._exit_code = 0 if self._shutdown else 1
+            return
+        method = message.get("method")
+        message_id = message.get("id")
+        params = message.get("params") or {}
+        handler = getattr(self, "_on_" + (method or "").replace("/", "_"), None)
+        if handler is None:
+            if message_id is not None and method is not None:
+                self._respond(
+                    message_id,
+                    error={"code": METHOD_NOT_FOUND, "message": f"Unknown {method}"},
+                )
+            return
+        try:
+            result = handler(params)
+        except (KeyError, TypeError, ValueError) as e:
+            if message_id is not None:
+                self._respond(
+                    message_id,
+                    error={"code": INVALID_REQUEST, "message": str(e)},
+                )
+            return
+        if message_id is not None:
+            self._respond(message_id, result)
+
+    def _on_initialize(self, _params):
+        return {
+            "capabilities": {
+                "textDocumentSync": {
+                    "openClose": True,
+                    "change": SYNC_INCREMENTAL,
+                },
+            },
+            "serverInfo": {"name": "doc8", "version": version.__version__},
+        }
+
+    def _on_initialized(self, _params):
+        pass
+
+    def _on_shutdown(self, _params):
+        self._shutdown = True
+
+    def _on_exit(self, _params):
+        self._exit_code = 0 if self._shutdown else 1
+
+    def _on_textDocument_didOpen(self, params):  # noqa: N802
+        item = params["textDocument"]
+        doc = Document(item["uri"], item["text"], item.get("version"))
+        self._documents[doc.uri] = doc
+        self._schedule(doc)
+
+    def _on_textDocument_didChange(self, params):  # noqa: N802
+        item = params["textDocument"]
+        doc = self._documents[item["uri"]]
+        for change in params["contentChanges"]:
+            doc.text = apply_change(doc.text, change)
+        doc.version = item.get("version")
+        self._schedule(doc)
+
+    def _on_textDocument_didClose(self, params):  # noqa: N802
+        doc = self._documents.pop(params["textDocument"]["uri"], None)
+        if doc is not None:
+            self._notify(
+                "textDocument/publishDiagnostics",
+                {"uri": doc.uri, "diagnostics": []},
+            )
+
+
+def serve(lint, stdin, stdout):
+    """Runs a language server validating documents with ``lint``."""
+    return LanguageServer(lint).serve(stdin, stdout)
@@ -29,26 +29,50 @@ What is checked:
 """
 
 import argparse
+import bisect
+import codecs
 import collections
 import configparser
+import contextlib
+import functools
+import itertools
+import json
 import logging
 import os
 import sys
 
+from doc8 import utils, version
+
 try:
     # py3.11+
-    from tomllib import load as toml_load  # type: ignore
+    tomllib = utils.lazy_import("tomllib")
 except ImportError:
     # py3.10 or older
-    from tomli import load as toml_load  # type: ignore[no-redef]
-
-from stevedore import extension
+    tomllib = utils.lazy_import("tomli")
 
-from doc8 import checks, utils, version
-from doc8 import parser as file_parser
+# Only loaded once used, so that the runs that do not need them (like
+# ``doc8 --version``, or runs that do not parse any document) start quickly.
+checks = utils.lazy_import("doc8.checks")
+daemon = utils.lazy_import("doc8.daemon")
+file_parser = utils.lazy_import("doc8.parser")
+fs_watch = utils.lazy_import("doc8.watch")
+futures = utils.lazy_import("concurrent.futures")
+lsp = utils.lazy_import("doc8.lsp")
+plugins = utils.lazy_import("doc8.plugins")
+reporters = utils.lazy_import("doc8.reporters")
+result_cache = utils.lazy_import("doc8.cache")
+vcs = utils.lazy_import("doc8.vcs")
 
 FILE_PATTERNS = [".rst", ".txt"]
 MAX_LINE_LENGTH = 79
+CACHE_MAX_SIZE = 64
+# Number of files whose outcomes ``validate`` keeps (when no ``results`` are
+# given) for the other paths that lead to the same files or contents.
+MAX_KEPT_OUTCOMES = 10000
+# The path that stands for the standard input, and the name its contents are
+# reported with.
+STDIN_PATH = "-"
+STDIN_FILENAME = "<stdin>"
 CONFIG_FILENAMES = [
     "doc8.ini",
     ".config/doc8.ini",
@@ -113,10 +137,42 @@ def from_ini(fp):
         cfg["sphinx"] = parser.getboolean("doc8", "sphinx")
     except (configparser.NoSectionError, configparser.NoOptionError):
         pass
+    try:
+        cfg["git"] = parser.getboolean("doc8", "git")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        pass
+    try:
+        cfg["diff_base"] = parser.get("doc8", "diff-base")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        pass
+    try:
+        cfg["changed_lines_only"] = parser.getboolean("doc8", "changed-lines-only")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        pass
     try:
         cfg["verbose"] = parser.getboolean("doc8", "verbose")
     except (configparser.NoSectionError, configparser.NoOptionError):
         pass
+    try:
+        cfg["format"] = parser.get("doc8", "format")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        pass
+    try:
+        cfg["jobs"] = parser.getint("doc8", "jobs")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        pass
+    try:
+        cfg["max_in_flight"] = parser.getint("doc8", "max-in-flight")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        pass
+    try:
+        cfg["cache_dir"] = parser.get("doc8", "cache-dir")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        pass
+    try:
+        cfg["cache_max_size"] = parser.getint("doc8", "cache-max-size")
+    except (configparser.NoSectionError, configparser.NoOptionError):
+        pass
     try:
         cfg["file_encoding"] = parser.get("doc8", "file-encoding")
     except (configparser.NoSectionError, configparser.NoOptionError):
@@ -138,7 +194,7 @@ def from_ini(fp):
 
 def from_toml(fp):
     with open(fp, "rb") as f:
-        parsed = toml_load(f).get("tool", {}).get("doc8", {})
+        parsed = tomllib.load(f).get("tool", {}).get("doc8", {})
 
     cfg = {}
     for key, value in parsed.items():
@@ -177,15 +233,7 @@ def fetch_checks(cfg):
         checks.CheckMaxLineLength(cfg),
         checks.CheckNewlineEndOfFile(cfg),
     ]
-    mgr = extension.ExtensionManager(
-        namespace="doc8.extension.check",
-        invoke_on_load=True,
-        invoke_args=(cfg.copy(),),
-    )
-    addons = []
-    for e in mgr:
-        addons.append(e.obj)
-    return base + addons
+    return base + plugins.fetch_checks(cfg)
 
 
 def setup_logging(verbose):
@@ -200,39 +248,391 @@ def setup_logging(verbose):
     )
 
 
+class Scan:
+    """Lazily discovers (and parses) the files to validate.
+
+    Iterating yields ``ParsedFile`` objects as soon as they are found so that
+    validation can start while discovery is still running, the selected and
+    ignored counters are updated as the iteration goes. The ignored
+    directories are not walked into, so the files they contain are not
+    counted as ignored (the directories are counted instead).
+    """
+
+    def __init__(self, cfg):
+        self._cfg = cfg
+        self.files_selected = 0
+        self.files_ignored = 0
+        self.dirs_ignored = 0
+
+    def __iter__(self):
+        cfg = self._cfg
+        changes = None
+        if cfg.get("diff_base"):
+            changes = vcs.GitChanges(cfg["diff_base"])
+        elif cfg.get("changed_lines_only"):
+            msg = "Only the lines changed since a diff base can be checked"
+            raise ValueError(msg)
+        changed_lines_only = changes is not None and cfg.get("changed_lines_only")
+        paths = cfg.get("paths", [])
+        if STDIN_PATH in paths:
+            paths = [path for path in paths if path != STDIN_PATH]
+            self.files_selected += 1
+            yield self._read_stdin()
+        file_iter = utils.find_files(
+            paths,
+            cfg.get("extension", []),
+            cfg.get("ignore_path", []),
+            use_git=cfg.get("git", False),
+            changes=changes,
+        )
+        default_extension = cfg.get("default_extension")
+        file_encoding = cfg.get("file_encoding")
+        for filename, ignoreable in file_iter:
+            if ignoreable:
+                if os.path.isdir(filename):
+                    self.dirs_ignored += 1
+                else:
+                    self.files_ignored += 1
+                if cfg.get("verbose"):
+                    print("  Ignoring '%s'" % (filename))
+            else:
+                f = file_parser.parse(
+                    filename,
+                    default_extension=default_extension,
+                    encoding=file_encoding,
+                )
+                if changed_lines_only:
+                    f.changed_lines = changes.lines(filename)
+                self.files_selected += 1
+                if cfg.get("verbose"):
+                    print("  Selecting '%s'" % (filename))
+                yield f
+
+    def _read_stdin(self):
+        cfg = self._cfg
+        f = file_parser.parse_bytes(
+            STDIN_FILENAME,
+            sys.stdin.buffer.read(),
+            default_extension=cfg.get("default_extension"),
+            encoding=cfg.get("file_encoding"),
+        )
+        if cfg.get("verbose"):
+            print("  Selecting '%s'" % (f.filename))
+        return f
+
+
 def scan(cfg):
     if not cfg.get("quiet"):
         print("Scanning...")
-    files = collections.deque()
-    ignored_paths = cfg.get("ignore_path", [])
-    files_ignored = 0
-    file_iter = utils.find_files(
-        cfg.get("paths", []),
-        cfg.get("extension", []),
-        ignored_paths,
-    )
-    default_extension = cfg.get("default_extension")
-    file_encoding = cfg.get("file_encoding")
-    for filename, ignoreable in file_iter:
-        if ignoreable:
-            files_ignored += 1
-            if cfg.get("verbose"):
-                print("  Ignoring '%s'" % (filename))
+    return Scan(cfg)
+
+
+def get_check_name(check):
+    if isinstance(check, plugins.LazyCheck):
+        return check.name
+    return ".".join([check.__class__.__module__, check.__class__.__name__])
+
+
+class CheckPlan:
+    """The checks to run on files, compiled once per run.
+
+    Which checks apply to a file only depends on its extension and on the
+    codes ignored for it, so the ordered list of checks (and the reason to
+    skip the others) is computed once per combination of those and then
+    looked up for every file.
+    """
+
+    def __init__(self, check_list):
+        self._checks = [(get_check_name(c), c) for c in check_list]
+        self._versions = {}
+        self._entries = {}
+
+    @classmethod
+    def from_config(cls, cfg):
+        return cls(fetch_checks(cfg))
+
+    @property
+    def checks(self):
+        return list(self._checks)
+
+    def version(self, name, check):
+        try:
+            return self._versions[name]
+        except KeyError:
+            check_version = result_cache.check_version(check)
+            self._versions[name] = check_version
+            return check_version
+
+    def lookup(self, extension, ignoreables):
+        """Returns the ``(check_name, check, skip_reason)`` for a file.
+
+        The ``skip_reason`` is ``None`` for the checks that should run.
+        """
+        key = (extension, frozenset(ignoreables))
+        try:
+            return self._entries[key]
+        except KeyError:
+            pass
+        entry = []
+        for name, c in self._checks:
+            entry.append((name, c, self._skip_reason(name, c, *key)))
+        entry = tuple(entry)
+        self._entries[key] = entry
+        return entry
+
+    @staticmethod
+    def _skip_reason(name, c, extension, ignoreables):
+        try:
+            extension_matcher = c.EXT_MATCHER
+        except AttributeError:
+            pass
+        else:
+            if not extension_matcher.match(extension):
+                return (
+                    "Skipping check '%s' since it does not"
+                    " understand parsing a file with extension '%s'" % (name, extension)
+                )
+        try:
+            reports = set(c.REPORTS)
+        except AttributeError:
+            pass
         else:
-            f = file_parser.parse(
-                filename,
-                default_extension=default_extension,
-                encoding=file_encoding,
+            reports = reports - ignoreables
+            if not reports:
+                return (
+                    "Skipping check '%s', determined to only"
+                    " check ignoreable codes" % name
+                )
+        return None
+
+    def describe(self):
+        lines = ["Check plan:"]
+        for name, c in self._checks:
+            details = []
+            reports = getattr(c, "REPORTS", None)
+            if reports is not None:
+                details.append("reports %s" % ", ".join(sorted(reports)))
+            extension_matcher = getattr(c, "EXT_MATCHER", None)
+            if extension_matcher is not None:
+                details.append(
+                    "on extensions matching '%s'" % extension_matcher.pattern,
+                )
+            artifacts = getattr(c, "ARTIFACTS", file_parser.ARTIFACTS)
+            details.append(
+                "uses %s"
+                % ", ".join(a for a in file_parser.ARTIFACTS if a in artifacts),
             )
-            files.append(f)
+            lines.append("  - {} ({})".format(name, ", ".join(details)))
+        return "\n".join(lines)
+
+
+def _run_line_checks(f, line_checks, targeted_ignoreables):
+    """Run line checks over the lines of a file in a single pass.
+
+    Every line is only decoded once and given to each check in turn, the
+    errors a check finds are added to the list ``line_checks`` pairs it with.
+    """
+    for line_num, line in enumerate(f.lines_iter(), 1):
+        for c, errors in line_checks:
+            for code, message in c.report_iter(line):
+                if code in targeted_ignoreables:
+                    continue
+                errors.append((line_num, code, message))
+
+
+def _run_buffer_checks(f, buffer_checks, targeted_ignoreables):
+    """Run buffer checks over the (UTF-8 encoded) contents of a file.
+
+    The contents and the offsets of their lines are only computed once, the
+    errors a check finds are added to the list ``buffer_checks`` pairs it
+    with.
+    """
+    if codecs.lookup(f.encoding).name == "utf-8":
+        buffer = f.buffer
+        line_number = f.line_number
+    else:
+        buffer = f.contents.encode("utf-8")
+        line_offsets = utils.line_offsets(buffer.splitlines(True))
+        line_number = functools.partial(bisect.bisect_right, line_offsets)
+    for c, errors in buffer_checks:
+        for offset, code, message in c.report_iter(buffer):
+            if code in targeted_ignoreables:
+                continue
+            errors.append((line_number(offset), code, message))
+
+
+def _check_file(plan, f, targeted_ignoreables, cache=None):
+    """Run the checks over one file and return what each of them found.
+
+    The result is a list of ``(check_name, skip_reason, errors)`` tuples (in
+    the order of the check ``plan``) where ``skip_reason`` is ``None`` when
+    the check ran and ``errors`` is a list of ``(line_num, code, message)``.
+
+    When a result ``cache`` is given the errors of checks found in it are
+    replayed without running them, and the others are added to it. Files
+    inserting other files are not cached, since their results also depend on
+    those files.
+    """
+    cache_key = None
+    cached = {}
+    if cache is not None and file_parser.FILE_INSERTION_REGEX.search(f.contents):
+        cache = None
+    if cache is not None:
+        cache_key = cache.key(f, targeted_ignoreables)
+        cached = cache.load(cache_key)
+    outcomes = []
+    to_run = []
+    for name, c, skip_reason in plan.lookup(f.extension, targeted_ignoreables):
+        if skip_reason is not None:
+            outcomes.append((name, skip_reason, []))
+            continue
+        if cache is not None:
+            cached_version, errors = cached.get(name, (None, None))
+            if cached_version == plan.version(name, c):
+                outcomes.append((name, None, errors))
+                continue
+        if isinstance(c, plugins.LazyCheck):
+            # Only imported now that a file needs it.
+            c = c.load()
+        errors = []
+        outcomes.append((name, None, errors))
+        to_run.append((name, c, errors))
+    # Only what the checks that run use is built from the file.
+    f.expect_artifacts(
+        itertools.chain.from_iterable(
+            c.used_artifacts(f)
+            if hasattr(c, "used_artifacts")
+            else getattr(c, "ARTIFACTS", file_parser.ARTIFACTS)
+            for _name, c, _e in to_run
+        ),
+    )
+    line_checks = []
+    buffer_checks = []
+    for name, c, errors in to_run:
+        if isinstance(c, checks.ContentCheck):
+            for line_num, code, message in c.report_iter(f):
+                if code in targeted_ignoreables:
+                    continue
+                if not isinstance(line_num, (float, int)):
+                    line_num = "?"
+                errors.append((line_num, code, message))
+        elif isinstance(c, checks.LineCheck):
+            # Filled in below, once every line check is known.
+            line_checks.append((c, errors))
+        elif isinstance(c, checks.BufferCheck):
+            buffer_checks.append((c, errors))
+        else:
+            raise TypeError(f"Unknown check type: {type(c)}, {c}")
+        if cache is not None:
+            cached[name] = (plan.version(name, c), errors)
+    if line_checks:
+        _run_line_checks(f, line_checks, targeted_ignoreables)
+    if buffer_checks:
+        _run_buffer_checks(f, buffer_checks, targeted_ignoreables)
+    if cache is not None and to_run:
+        cache.store(cache_key, cached)
+    return outcomes
+
+
+# Per process state of the validation workers (see ``_init_worker``).
+_worker_plan = None
+_worker_cache = None
+
+
+def _init_worker(cfg):
+    # pylint: disable=global-statement
+    global _worker_plan, _worker_cache  # noqa: PLW0603
+    _worker_plan = CheckPlan.from_config(cfg)
+    _worker_cache = result_cache.ResultCache.from_config(cfg)
+
+
+def _check_file_in_worker(job):
+    f, targeted_ignoreables, _key = job
+    try:
+        outcomes = _check_file(
+            _worker_plan,
+            f,
+            targeted_ignoreables,
+            cache=_worker_cache,
+        )
+    finally:
+        f.close()
+    return (outcomes, f.builds)
+
+
+def _in_changed_lines(changed_lines, line_num):
+    if changed_lines is None or not isinstance(line_num, int):
+        return True
+    index = bisect.bisect_right(changed_lines, (line_num, float("inf")))
+    return index > 0 and changed_lines[index - 1][1] >= line_num
+
+
+def _report_file(cfg, f, outcomes, result, error_counts):
+    for check_name, skip_reason, errors in outcomes:
+        error_counts.setdefault(check_name, 0)
+        if skip_reason is not None:
             if cfg.get("verbose"):
-                print("  Selecting '%s'" % (filename))
-    return (files, files_ignored)
+                print("  %s" % skip_reason)
+            continue
+        if cfg.get("verbose"):
+            print("  Running check '%s'" % check_name)
+        for line_num, code, message in errors:
+            if not _in_changed_lines(f.changed_lines, line_num):
+                continue
+            if cfg.get("verbose"):
+                print(f"    - {f.filename}:{line_num}: {code} {message}")
+            result.error(check_name, f.filename, line_num, code, message)
+            error_counts[check_name] += 1
 
 
-def validate(cfg, files, result=None):
-    if not cfg.get("quiet"):
-        print("Validating...")
+def get_jobs(cfg):
+    jobs = cfg.get("jobs", 1)
+    if jobs < 0:
+        raise ValueError("The number of jobs must not be negative: %s" % jobs)
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    return jobs
+
+
+def get_max_in_flight(cfg, jobs):
+    max_in_flight = cfg.get("max_in_flight")
+    if not max_in_flight:
+        max_in_flight = 4 * jobs
+    return max(max_in_flight, 1)
+
+
+def _bounded_map(executor, func, items, limit, skip=None):
+    """Like ``executor.map`` but with at most ``limit`` items in flight.
+
+    Yields ``(item, result)`` pairs in the order of ``items``, which are only
+    pulled from the (lazy) iterable when there is room for them. Items for
+    which ``skip(item)`` is true are not submitted, their result is ``None``.
+    """
+    in_flight = collections.deque()
+    for item in items:
+        future = None
+        if skip is None or not skip(item):
+            future = executor.submit(func, item)
+        in_flight.append((item, future))
+        if len(in_flight) >= limit:
+            item, future = in_flight.popleft()
+            yield item, None if future is None else future.result()
+    while in_flight:
+        item, future = in_flight.popleft()
+        yield item, None if future is None else future.result()
+
+
+def describe_builds(builds):
+    lines = ["Artifacts built:"]
+    for artifact in file_parser.ARTIFACTS:
+        lines.append("  - %s = %s" % (artifact, builds[artifact]))
+    return "\n".join(lines)
+
+
+def validate(cfg, files, result=None, plan=None, results=None):
+    jobs = get_jobs(cfg)
+    if plan is None and (jobs == 1 or cfg.get("verbose")):
+        plan = CheckPlan.from_config(cfg)
     error_counts = {}
     ignoreables = frozenset(cfg.get("ignore", []))
     ignore_targeted = cfg.get("ignore_path_errors", {})
@@ -240,77 +640,141 @@ def validate(cfg, files, result=None):
         os.path.abspath(file_path): ignore_codes
         for file_path, ignore_codes in ignore_targeted.items()
     }
-    while files:
-        f = files.popleft()
-        if cfg.get("verbose"):
-            print("Validating %s" % f)
-        targeted_ignoreables = set(ignore_targeted.get(f.filename, set()))
-        targeted_ignoreables.update(ignoreables)
-        for c in fetch_checks(cfg):
-            check_name = ".".join([c.__class__.__module__, c.__class__.__name__])
-            error_counts.setdefault(check_name, 0)
-            try:
-                extension_matcher = c.EXT_MATCHER
-            except AttributeError:
-                pass
-            else:
-                if not extension_matcher.match(f.extension):
-                    if cfg.get("verbose"):
-                        print(
-                            "  Skipping check '%s' since it does not"
-                            " understand parsing a file with extension '%s'"
-                            % (check_name, f.extension),
-                        )
-                    continue
-            try:
-                reports = set(c.REPORTS)
-            except AttributeError:
-                pass
-            else:
-                reports = reports - targeted_ignoreables
-                if not reports:
-                    if cfg.get("verbose"):
-                        print(
-                            "  Skipping check '%s', determined to only"
-                            " check ignoreable codes" % check_name,
-                        )
-                    continue
+    cache = result_cache.ResultCache.from_config(cfg)
+    builds = collections.Counter()
+    announced = False
+
+    def announce():
+        nonlocal announced
+        if not announced:
+            if not cfg.get("quiet"):
+                print("Validating...")
             if cfg.get("verbose"):
-                print("  Running check '%s'" % check_name)
-            if isinstance(c, checks.ContentCheck):
-                for line_num, code, message in c.report_iter(f):
-                    if code in targeted_ignoreables:
-                        continue
-                    if not isinstance(line_num, (float, int)):
-                        line_num = "?"
-                    if cfg.get("verbose"):
-                        print(
-                            f"    - {f.filename}:{line_num}: {code} {message}",
-                        )
-                    elif not result.capture:
-                        print(
-                            f"{f.filename}:{line_num}: {code} {message}",
-                        )
-                    result.error(check_name, f.filename, line_num, code, message)
-                    error_counts[check_name] += 1
-            elif isinstance(c, checks.LineCheck):
-                for line_num, line in enumerate(f.lines_iter(), 1):
-                    for code, message in c.report_iter(line):
-                        if code in targeted_ignoreables:
-                            continue
-                        if cfg.get("verbose"):
-                            print(
-                                "    - %s:%s: %s %s"
-                                % (f.filename, line_num, code, message),
-                            )
-                        elif not result.capture:
-                            print(
-                                f"{f.filename}:{line_num}: {code} {message}",
-                            )
-                        result.error(check_name, f.filename, line_num, code, message)
-                        error_counts[check_name] += 1
+                print(plan.describe())
+        announced = True
+
+    # Files reached through several paths (links, or copies) get the same
+    # results, so only the first of them is checked. Files are identified by
+    # the digest of their contents, which is computed once per inode. Files
+    # inserting others find them relative to their own path, so those are
+    # only identified by their inode and directory. When given, the
+    # ``results`` of a previous call (with the same plan) are reused and
+    # updated, otherwise only the outcomes of the files reported last are
+    # kept (enough of them for those still in flight to find theirs).
+    digests = {}
+    aliases = {}
+    max_kept = None
+    if results is None:
+        results = {}
+        max_kept = max(MAX_KEPT_OUTCOMES, get_max_in_flight(cfg, jobs))
+    # Keys of the outcomes that are going to be kept once known.
+    pending = set()
+
+    def file_key(f, targeted_ignoreables):
+        """Returns the ``(store, key)`` of the outcomes of ``f`` (or ``None``).
+
+        The ``store`` is either ``results`` or ``aliases``.
+        """
+        options = (f.extension, f.encoding, frozenset(targeted_ignoreables))
+        if f.in_memory:
+            if file_parser.FILE_INSERTION_REGEX.search(f.contents):
+                return None
+            return (results, (f.digest, *options))
+        try:
+            stat = os.stat(f.filename)
+        except OSError:
+            return None
+        inode = (stat.st_dev, stat.st_ino)
+        if inode not in digests:
+            # Files inserting others have no digest.
+            inserts = file_parser.FILE_INSERTION_REGEX.search(f.contents)
+            digests[inode] = None if inserts else f.digest
+        digest = digests[inode]
+        if digest is None:
+            directory = os.path.dirname(os.path.abspath(f.filename))
+            return (aliases, (inode, directory, *options))
+        return (results, (digest, *options))
+
+    def iter_jobs():
+        for f in files:
+            targeted_ignoreables = set(ignore_targeted.get(f.filename, set()))
+            targeted_ignoreables.update(ignoreables)
+            key = file_key(f, targeted_ignoreables)
+            if jobs > 1:
+                # Workers read the file again.
+                f.close()
+            announce()
+            yield (f, targeted_ignoreables, key)
+
+    def is_duplicate(job):
+        if job[2] is None:
+            return False
+        store, key = job[2]
+        if key in pending:
+            return True
+        if key in store:
+            # Moved last, so that it is not evicted before it is reported.
+            store[key] = store.pop(key)
+            return True
+        pending.add(key)
+        return False
+
+    def known_outcomes(store_key):
+        store, key = store_key
+        return store[key]
+
+    def keep_outcomes(store_key, outcomes):
+        if store_key is None:
+            return
+        store, key = store_key
+        pending.discard(key)
+        store[key] = outcomes
+        if max_kept is not None:
+            while len(store) > max_kept:
+                del store[next(iter(store))]
+
+    if jobs > 1:
+        # Workers build their check plan once and hand back plain data, the
+        # outcomes are then reported here in the same order as a serial run.
+        with futures.ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(cfg,),
+        ) as executor:
+            for (f, _targeted_ignoreables, key), worker_result in _bounded_map(
+                executor,
+                _check_file_in_worker,
+                iter_jobs(),
+                get_max_in_flight(cfg, jobs),
+                skip=is_duplicate,
+            ):
+                if worker_result is None:
+                    outcomes = known_outcomes(key)
+                else:
+                    outcomes, file_builds = worker_result
+                    builds.update(file_builds)
+                    keep_outcomes(key, outcomes)
+                if cfg.get("verbose"):
+                    print("Validating %s" % f)
+                    f.close()
+                _report_file(cfg, f, outcomes, result, error_counts)
+    else:
+        for f, targeted_ignoreables, key in iter_jobs():
+            if cfg.get("verbose"):
+                print("Validating %s" % f)
+            if is_duplicate((f, targeted_ignoreables, key)):
+                outcomes = known_outcomes(key)
             else:
-                raise TypeError(f"Unknown check type: {type(c)}, {c}")
+                outcomes = _check_file(plan, f, targeted_ignoreables, cache=cache)
+                builds.update(f.builds)
+                keep_outcomes(key, outcomes)
+            f.close()
+            _report_file(cfg, f, outcomes, result, error_counts)
+    announce()
+    if cfg.get("verbose"):
+        print(describe_builds(builds))
+    if cache is not None:
+        cache.prune()
     return error_counts
 
 
@@ -327,6 +791,19 @@ def get_defaults():
         "file_encoding": "",
         "max_line_length": MAX_LINE_LENGTH,
         "extension": list(FILE_PATTERNS),
+        "git": False,
+        "diff_base": "",
+        "changed_lines_only": False,
+        "watch": False,
+        "daemon": False,
+        "socket": "",
+        "lsp": False,
+        "format": "text",
+        "jobs": 1,
+        "max_in_flight": 0,
+        "cache": True,
+        "cache_dir": "",
+        "cache_max_size": CACHE_MAX_SIZE,
         "quiet": False,
         "verbose": False,
         "version": False,
@@ -334,25 +811,36 @@ def get_defaults():
 
 
 class Result:
-    def __init__(self):
+    """What a run found.
+
+    The errors are handed to the ``reporter`` (see ``doc8.reporters``) as
+    they are found when there is one, only their count is kept then.
+    Otherwise they are kept in ``errors``.
+    """
+
+    def __init__(self, reporter=None):
         self.files_selected = 0
         self.files_ignored = 0
+        self.dirs_ignored = 0
         self.error_counts = {}
         self.errors = []
+        self.total_errors = 0
         self.capture = False
-
-    @property
-    def total_errors(self):
-        return len(self.errors)
+        self.reporter = reporter
 
     # pylint: disable=too-many-positional-arguments
     def error(self, check_name, filename, line_num, code, message):
-        self.errors.append((check_name, filename, line_num, code, message))
+        self.total_errors += 1
+        if self.reporter is not None:
+            self.reporter.error(check_name, filename, line_num, code, message)
+        else:
+            self.errors.append((check_name, filename, line_num, code, message))
 
-    def finish(self, files_selected, files_ignored, error_counts):
+    def finish(self, files_selected, files_ignored, error_counts, dirs_ignored=0):
         self.files_selected = files_selected
         self.files_ignored = files_ignored
         self.error_counts = error_counts
+        self.dirs_ignored = dirs_ignored
 
     def report(self):
         lines = []
@@ -364,8 +852,10 @@ class Result:
             "=" * 8,
             "Total files scanned = %s" % (self.files_selected),
             "Total files ignored = %s" % (self.files_ignored),
-            "Total accumulated errors = %s" % (self.total_errors),
         ])
+        if self.dirs_ignored:
+            lines.append("Total directories ignored = %s" % (self.dirs_ignored))
+        lines.append("Total accumulated errors = %s" % (self.total_errors))
 
         if self.error_counts:
             lines.append("Detailed error counts:")
@@ -376,16 +866,45 @@ class Result:
         return "\n".join(lines)
 
 
-def doc8(args=None, **kwargs):
-    result = Result()
-    if args is None:
-        args = get_defaults()
+class Session:
+    """Check plans (and the outcomes they found) kept between runs.
 
-        # Force reporting to suppress all output
-        kwargs["quiet"] = True
-        kwargs["verbose"] = False
-        result.capture = True
+    Long running processes (like the daemon) reuse the plan built for the
+    same configuration, along with the outcomes of the files validated
+    with it, instead of building them again on every run.
+    """
+
+    MAX_PLANS = 8
+    MAX_RESULTS = 100000
 
+    def __init__(self):
+        self._plans = collections.OrderedDict()
+
+    def lookup(self, cfg):
+        """Returns the ``(plan, results)`` to validate files with ``cfg``."""
+        key = json.dumps(
+            {k: v for k, v in cfg.items() if k != "paths"},
+            sort_keys=True,
+            default=sorted,
+        )
+        try:
+            self._plans.move_to_end(key)
+            plan, results = self._plans[key]
+        except KeyError:
+            plan, results = CheckPlan.from_config(cfg), {}
+            self._plans[key] = (plan, results)
+            if len(self._plans) > self.MAX_PLANS:
+                self._plans.popitem(last=False)
+        if len(results) > self.MAX_RESULTS:
+            results.clear()
+        return plan, results
+
+
+def resolve_config(args, **kwargs):
+    """Merges the configuration files into the command line ``args``.
+
+    The ``kwargs`` override both of them.
+    """
     args["ignore"] = merge_sets(args["ignore"])
     cfg = extract_config(args)
     args["ignore"].update(cfg.pop("ignore", set()))
@@ -406,17 +925,240 @@ def doc8(args=None, **kwargs):
 
     # Override args with any kwargs
     args.update(kwargs.items())
+    return args
+
+
+def get_reporter(cfg):
+    """Returns the reporter printing the errors in the configured format."""
+    output_format = cfg.get("format") or "text"
+    try:
+        reporter_cls = reporters.REPORTERS[output_format]
+    except KeyError:
+        raise ValueError("Unknown output format: %s" % output_format) from None
+    return reporter_cls(sys.stdout)
+
+
+def doc8(args=None, session=None, reporter=None, **kwargs):
+    result = Result(reporter)
+    if args is None:
+        args = get_defaults()
+
+        # Force reporting to suppress all output
+        kwargs["quiet"] = True
+        kwargs["verbose"] = False
+        result.capture = True
+
+    args = resolve_config(args, **kwargs)
+    if (args.get("format") or "text") != "text":
+        if args.get("watch"):
+            msg = "Watching only prints the errors as text"
+            raise ValueError(msg)
+        # Nothing else is printed.
+        args.update(quiet=True, verbose=False)
+    if (
+        reporter is None
+        and not result.capture
+        and not args.get("verbose")
+        and not args.get("watch")
+    ):
+        # Errors are printed as they are found (the verbose output prints
+        # them along with the checks that found them).
+        reporter = result.reporter = get_reporter(args)
     setup_logging(args.get("verbose"))
 
-    files, files_ignored = scan(args)
-    files_selected = len(files)
+    if args.get("watch"):
+        return watch(args, result=result)
+
+    plan = results = None
+    if session is not None:
+        plan, results = session.lookup(args)
+    if reporter is not None:
+        reporter.start()
+    files = scan(args)
+    error_counts = validate(args, files, result=result, plan=plan, results=results)
+    result.finish(
+        files.files_selected,
+        files.files_ignored,
+        error_counts,
+        dirs_ignored=files.dirs_ignored,
+    )
+    if reporter is not None:
+        reporter.finish(result)
+    return result
+
+
+def lint_text(text, filename=STDIN_FILENAME, **kwargs):
+    """Validates ``text`` as the contents of ``filename`` (without reading it).
 
-    error_counts = validate(args, files, result=result)
-    result.finish(files_selected, files_ignored, error_counts)
+    Takes the same options as ``doc8`` (which the configuration files are
+    merged with in the same way) and returns the same kind of result.
+    """
+    result = Result()
+    result.capture = True
+    kwargs["quiet"] = True
+    kwargs["verbose"] = False
+    args = resolve_config(get_defaults(), **kwargs)
+    setup_logging(args.get("verbose"))
+    f = file_parser.parse_text(
+        filename,
+        text,
+        encoding=args.get("file_encoding"),
+        default_extension=args.get("default_extension"),
+    )
+    error_counts = validate(args, [f], result=result)
+    result.finish(1, 0, error_counts)
     return result
 
 
-def main():
+def serve_language_server(cfg, stdin, stdout):
+    """Runs a language server validating the documents opened in editors.
+
+    Documents are validated from their contents in the editor with the same
+    checks (and configuration) as the files on disk.
+    """
+    plan = CheckPlan.from_config(cfg)
+    extensions = set(cfg.get("extension", []))
+    ignored = utils.PathMatcher(cfg.get("ignore_path", []))
+    ignoreables = frozenset(cfg.get("ignore", []))
+    ignore_targeted = {
+        os.path.abspath(file_path): ignore_codes
+        for file_path, ignore_codes in cfg.get("ignore_path_errors", {}).items()
+    }
+
+    def lint(path, text):
+        if os.path.splitext(path)[1] not in extensions:
+            return None
+        if ignored.matches_ancestry(path):
+            return None
+        f = file_parser.ParsedFile(
+            path,
+            encoding="utf-8",
+            default_extension=cfg.get("default_extension"),
+            data=text.encode("utf-8"),
+        )
+        targeted_ignoreables = set(ignore_targeted.get(os.path.abspath(path), set()))
+        targeted_ignoreables.update(ignoreables)
+        outcomes = _check_file(plan, f, targeted_ignoreables)
+        return [error for _name, _skip_reason, errors in outcomes for error in errors]
+
+    return lsp.serve(lint, stdin, stdout)
+
+
+def _in_paths(path, paths):
+    path = os.path.abspath(path)
+    for top in paths:
+        top = os.path.abspath(top)
+        if path == top or path.startswith(os.path.join(top, "")):
+            return True
+    return False
+
+
+def watch(cfg, result=None, watcher=None):
+    """Validates the files again whenever they change, until interrupted.
+
+    The check plan and the errors of the files that did not change are
+    kept between runs, only the changed (or created) files are validated
+    again. Returns the result of the last run.
+    """
+    if result is None:
+        result = Result()
+    paths = cfg.get("paths", [])
+    plan = CheckPlan.from_config(cfg)
+    # Files are validated quietly, their errors are printed once known.
+    run_cfg = dict(cfg, quiet=True, verbose=False)
+    # The errors of every selected file, by file name.
+    file_errors = {}
+    # The files and directories ignored by the last run over every path.
+    ignored = (0, 0)
+
+    def run(run_paths):
+        run_result = Result()
+        run_result.capture = True
+        files = Scan(dict(run_cfg, paths=run_paths))
+        scanned = []
+
+        def scan_files():
+            for f in files:
+                scanned.append(f.filename)
+                yield f
+
+        validate(run_cfg, scan_files(), result=run_result, plan=plan)
+        for filename in scanned:
+            file_errors[filename] = []
+        for error in run_result.errors:
+            file_errors[error[1]].append(error)
+        for error in run_result.errors:
+            print("%s:%s: %s %s" % error[1:])
+        return (files.files_ignored, files.dirs_ignored)
+
+    def report():
+        result.errors = list(itertools.chain.from_iterable(file_errors.values()))
+        result.total_errors = len(result.errors)
+        error_counts = dict.fromkeys((name for name, _c in plan.checks), 0)
+        for check_name, *_rest in result.errors:
+            error_counts[check_name] += 1
+        files_ignored, dirs_ignored = ignored
+        result.finish(
+            len(file_errors),
+            files_ignored,
+            error_counts,
+            dirs_ignored=dirs_ignored,
+        )
+        if not cfg.get("quiet"):
+            print(result.report())
+            print("Watching for changes...")
+
+    def list_files():
+        return [
+            path
+            for path, ignorable in utils.find_files(
+                paths,
+                cfg.get("extension", []),
+                cfg.get("ignore_path", []),
+                use_git=cfg.get("git", False),
+            )
+            if not ignorable
+        ]
+
+    def run_changed(changed):
+        nonlocal ignored
+        if changed is None:
+            # Changes were missed, start over.
+            file_errors.clear()
+            ignored = run(paths)
+            return
+        to_run = []
+        for path in sorted(changed):
+            file_errors.pop(path, None)
+            prefix = os.path.join(path, "")
+            for filename in [f for f in file_errors if f.startswith(prefix)]:
+                del file_errors[filename]
+            if (
+                os.path.exists(path)
+                and _in_paths(path, paths)
+                # Already found in a changed directory.
+                and not _in_paths(path, to_run)
+            ):
+                to_run.append(path)
+        if to_run:
+            run(to_run)
+
+    if watcher is None:
+        watcher = fs_watch.watcher(paths, cfg.get("ignore_path", []), list_files)
+    try:
+        ignored = run(paths)
+        report()
+        while True:
+            run_changed(watcher.wait())
+            report()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    return result
+
+
+def main(argv=None, session=None):
     defaults = get_defaults()
     parser = argparse.ArgumentParser(
         prog="doc8",
@@ -428,7 +1170,10 @@ def main():
         metavar="path",
         type=str,
         nargs="*",
-        help=("path to scan for doc files (default: current directory)."),
+        help=(
+            "path to scan for doc files, - to read a document from the"
+            " standard input (default: current directory)."
+        ),
         default=defaults["paths"],
     )
     parser.add_argument(
@@ -463,7 +1208,8 @@ def main():
         "--ignore-path",
         action="append",
         default=defaults["ignore_path"],
-        help="ignore the given directory or file (globs are supported).",
+        help="ignore the given directory or file (globs are supported, "
+        "** matches any number of directories).",
         metavar="path",
     )
     parser.add_argument(
@@ -507,6 +1253,109 @@ def main():
         " (default: %s)." % ", ".join(defaults["extension"]),
         default=defaults["extension"],
     )
+    parser.add_argument(
+        "--git",
+        action="store_true",
+        help="find the files to check in the git repository of the given"
+        " directories (the files git tracks and untracked files that it does"
+        " not ignore) instead of walking them (default: false).",
+        default=defaults["git"],
+    )
+    parser.add_argument(
+        "--diff-base",
+        metavar="ref",
+        help="only check the files changed since the given git reference"
+        " (along with the untracked files that git does not ignore).",
+        default=defaults["diff_base"],
+    )
+    parser.add_argument(
+        "--changed-lines-only",
+        action="store_true",
+        help="only report the errors found on the lines changed since the"
+        " --diff-base reference, the files are still checked as a whole"
+        " (default: false).",
+        default=defaults["changed_lines_only"],
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running and validate the files again whenever they"
+        " change (default: false).",
+        default=defaults["watch"],
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="keep running and validate the files requested by doc8-client"
+        " through a local socket (default: false).",
+        default=defaults["daemon"],
+    )
+    parser.add_argument(
+        "--socket",
+        metavar="path",
+        help="path of the socket of the daemon (default: $DOC8_SOCKET, or"
+        " doc8-<uid>.sock in $XDG_RUNTIME_DIR or the temporary directory).",
+        default=defaults["socket"],
+    )
+    parser.add_argument(
+        "--lsp",
+        action="store_true",
+        help="run a language server (over the standard input and output)"
+        " validating the documents opened in editors (default: false).",
+        default=defaults["lsp"],
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        action="store",
+        metavar="int",
+        type=int,
+        help="number of processes used to validate files, 0 uses all the"
+        " available CPUs (default: %s)." % defaults["jobs"],
+        default=defaults["jobs"],
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        action="store",
+        metavar="int",
+        type=int,
+        help="maximum number of files being validated at the same time when"
+        " using multiple jobs (default: 4 times the number of jobs).",
+        default=defaults["max_in_flight"],
+    )
+    parser.add_argument(
+        "--cache-dir",
+        action="store",
+        metavar="path",
+        help="directory used to cache the results of unchanged files"
+        " (default: no caching).",
+        default=defaults["cache_dir"],
+    )
+    parser.add_argument(
+        "--cache-max-size",
+        action="store",
+        metavar="int",
+        type=int,
+        help="maximum size in megabytes of the result cache, least recently"
+        " used entries are evicted above it (default: %s)."
+        % defaults["cache_max_size"],
+        default=defaults["cache_max_size"],
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_false",
+        help="do not read or write the result cache.",
+        default=defaults["cache"],
+        dest="cache",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["text", "jsonl", "sarif"],
+        help="format of the errors printed, the machine readable ones (a JSON"
+        " object per line or a SARIF log) are the only output"
+        " (default: %s)." % defaults["format"],
+        default=defaults["format"],
+    )
     parser.add_argument(
         "-q",
         "--quiet",
@@ -529,14 +1378,41 @@ def main():
         help="show the version and exit.",
         default=defaults["version"],
     )
-    args = vars(parser.parse_args())
+    args = vars(parser.parse_args(argv))
     if args.get("version"):
         print(version.__version__)
         return 0
+    if session is not None and (
+        args.get("daemon") or args.get("watch") or args.get("lsp")
+    ):
+        parser.error("--daemon, --lsp and --watch can not be used through the daemon")
+    if args.get("lsp"):
+        # Standard output is the channel of the protocol. Messages are read
+        # from an unbuffered stream of their own, which can be closed while
+        # another thread still waits on it when the server exits.
+        stdout = sys.stdout.buffer
+        with (
+            open(os.dup(sys.stdin.fileno()), "rb", buffering=0) as stdin,
+            contextlib.redirect_stdout(sys.stderr),
+        ):
+            return serve_language_server(resolve_config(args), stdin, stdout)
+    if args.get("daemon"):
+        setup_logging(args.get("verbose"))
+        socket_path = args.get("socket") or daemon.default_socket_path()
+        return daemon.serve(socket_path, functools.partial(main, session=Session()))
+
+    if args.get("changed_lines_only") and not args.get("diff_base"):
+        parser.error("--changed-lines-only requires --diff-base")
+    if args.get("format") != "text" and args.get("watch"):
+        parser.error("--watch only prints errors as text")
 
-    result = doc8(args)
+    try:
+        result = doc8(args, session=session)
+    except ValueError as e:
+        # Like an unknown --diff-base reference, or invalid configuration.
+        parser.error(str(e))
 
-    if not args.get("quiet"):
+    if not args.get("quiet") and not args.get("watch"):
         print(result.report())
 
     if result.total_errors:
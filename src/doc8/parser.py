@@ -12,39 +12,204 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import array
+import bisect
+import collections
+import collections.abc
+import contextlib
 import errno
+import hashlib
+import mmap
 import os
+import re
 import threading
 
-import restructuredtext_lint as rl
-from docutils import frontend, utils
-from docutils import parsers as docutils_parser
+from doc8.utils import lazy_import
+
+# Only needed by the checks that use the messages of the rst linter or the
+# doctree (see ``ARTIFACTS``).
+rl = lazy_import("restructuredtext_lint")
+core = lazy_import("docutils.core")
+frontend = lazy_import("docutils.frontend")
+nodes = lazy_import("docutils.nodes")
+utils = lazy_import("docutils.utils")
+docutils_parser = lazy_import("docutils.parsers")
+
+# Contents (and messages) that make a difference between the settings used
+# when linting and when building the document, file insertion is only enabled
+# in the former and only the latter hides warnings (the code directive then
+# builds a different node when it can not highlight its contents).
+FILE_INSERTION_REGEX = re.compile(
+    r"^\s*\.\.\s+include::|^\s*:(?:file|url|scale):",
+    re.MULTILINE,
+)
+SETTINGS_DEPENDENT_MESSAGES = ("Cannot analyze code.",)
+# What is built (on demand) from the contents of a file: the bytes read from
+# it, the index of its lines, the messages of the rst linter and the doctree.
+ARTIFACTS = ("buffer", "lines", "errors", "document")
+NEWLINE = ord("\n")
+CARRIAGE_RETURN = ord("\r")
+
+
+class Lines(collections.abc.Sequence):
+    """Read only sequence of the lines of a parsed file, built on demand."""
+
+    def __init__(self, parsed_file):
+        self._parsed_file = parsed_file
+
+    def __len__(self):
+        return self._parsed_file.line_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self._parsed_file.line(index)
 
 
 class ParsedFile:
     FALLBACK_ENCODING = "utf-8"
+    # Files at least this big (in bytes) are memory mapped instead of read.
+    MMAP_THRESHOLD = 1024 * 1024
+    NEWLINE_REGEX = re.compile(rb"\r\n|\r|\n")
 
-    def __init__(self, filename, encoding=None, default_extension=""):
+    def __init__(self, filename, encoding=None, default_extension="", data=None):
         self._filename = filename
         self._content = None
-        self._raw_content = None
+        self._buffer = None
+        # Contents given in memory (like those of an editor buffer) are used
+        # instead of reading the file, which does not need to exist.
+        self._data = None if data is None else bytes(data)
+        self.in_memory = data is not None
         self._encoding = encoding
         self._doc = None
         self._errors = None
-        self._lines = None
+        self._line_starts = None
+        self._digest = None
         self._has_read = False
+        self._expected_artifacts = frozenset(ARTIFACTS)
+        self.builds = collections.Counter()
+        # The (inclusive) line ranges errors are reported for, all of them
+        # when ``None``.
+        self.changed_lines = None
         self._extension = os.path.splitext(filename)[1]
         self._read_lock = threading.Lock()
         if not self._extension:
             self._extension = default_extension
 
+    def __getstate__(self):
+        # Only ship what is needed to (re)read the file to other processes,
+        # the lock can not be pickled and the cached contents are cheaper to
+        # read again than to send.
+        state = self.__dict__.copy()
+        state.update({
+            "_content": None,
+            "_buffer": None,
+            "_doc": None,
+            "_errors": None,
+            "_line_starts": None,
+            "_has_read": False,
+        })
+        state["builds"] = collections.Counter()
+        del state["_read_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._read_lock = threading.Lock()
+
+    def expect_artifacts(self, artifacts):
+        """Tells which of the ``ARTIFACTS`` are going to be used.
+
+        The artifacts that are not expected are not built as a by-product of
+        the others (they are still built on demand if they are used).
+        """
+        self._expected_artifacts = frozenset(artifacts)
+
     @property
     def errors(self):
         if self._errors is not None:
             return self._errors
-        self._errors = rl.lint(self.contents, filepath=self.filename)
+        self.builds["errors"] += 1
+        if FILE_INSERTION_REGEX.search(self.contents):
+            self._errors = rl.lint(self.contents, filepath=self.filename)
+        else:
+            self._errors = self._lint()
         return self._errors
 
+    @staticmethod
+    def _copy_document(doc):
+        # Nodes added to a tree get the current source and line of the
+        # document when they do not have one, which should not happen here.
+        current = (doc.current_source, doc.current_line)
+        doc.current_source = doc.current_line = None
+        try:
+            return doc.deepcopy()
+        finally:
+            doc.current_source, doc.current_line = current
+
+    def _lint(self):
+        """Lint the contents like ``restructuredtext_lint.lint`` does.
+
+        The doctree produced by the parser (before any transform is applied)
+        is the same one that ``document`` would build, so a copy of it is kept
+        (when the document is expected to be used) instead of parsing the
+        contents a second time.
+        """
+        pub = core.Publisher(None, None, None, settings=None)
+        pub.set_components("standalone", "restructuredtext", "pseudoxml")
+        settings = pub.get_settings(halt_level=5)
+        pub.set_io()
+        doc = utils.new_document(self.filename, settings)
+        doc.reporter.stream = None
+        errors = []
+
+        def annotate(data):
+            data.level = data["level"]
+            data.type = data["type"]
+            data.message = nodes.Element.astext(data.children[0])
+            data.full_message = nodes.Element.astext(data)
+            errors.append(data)
+
+        def locate(data):
+            data.line = data.get("line")
+            data.source = data["source"]
+
+        # The messages are part of the doctree, so the line and source
+        # attributes (that docutils nodes also have) are only overwritten
+        # once that doctree has been copied.
+        doc.reporter.attach_observer(annotate)
+        pub.reader.parser.parse(self.contents, doc)
+        if (
+            self._doc is None
+            and "document" in self._expected_artifacts
+            and not any(
+                data.message.startswith(SETTINGS_DEPENDENT_MESSAGES) for data in errors
+            )
+        ):
+            self.builds["document"] += 1
+            self._doc = self._copy_document(doc)
+        for data in errors:
+            locate(data)
+        doc.reporter.detach_observer(annotate)
+
+        def error_collector(data):
+            locate(data)
+            annotate(data)
+
+        doc.reporter.attach_observer(error_collector)
+
+        # Apply the transforms (which may report more errors) the same way
+        # as restructuredtext_lint.
+        doc.transformer.populate_from_components((
+            pub.source,
+            pub.reader,
+            pub.reader.parser,
+            pub.writer,
+            pub.destination,
+        ))
+        doc.transformer.apply_transforms()
+        return errors
+
     @property
     def document(self):
         if self._doc is None:
@@ -70,6 +235,7 @@ class ParsedFile:
                 source_path=self.filename,
                 settings=opt.get_default_values(),
             )
+            self.builds["document"] += 1
             parser.parse(self.contents, doc)
             self._doc = doc
         return self._doc
@@ -78,26 +244,96 @@ class ParsedFile:
         if self._has_read:
             return
         with self._read_lock:
-            if not self._has_read:
+            if self._has_read:
+                return
+            if self._data is not None:
+                self._buffer = self._data
+            else:
                 with open(self.filename, "rb") as fh:
-                    self._raw_content = fh.read()
-                    self._lines = self._raw_content.splitlines(True)
-                self._has_read = True
+                    size = os.fstat(fh.fileno()).st_size
+                    if size and size >= self.MMAP_THRESHOLD:
+                        self._buffer = mmap.mmap(
+                            fh.fileno(),
+                            0,
+                            access=mmap.ACCESS_READ,
+                        )
+                    else:
+                        self._buffer = fh.read()
+            self.builds["buffer"] += 1
+            self._has_read = True
+
+    def close(self):
+        """Releases the contents read from the file.
+
+        They are read again if they are needed afterwards.
+        """
+        with self._read_lock:
+            buffer = self._buffer
+            self._buffer = None
+            self._content = None
+            self._line_starts = None
+            self._has_read = False
+        if isinstance(buffer, mmap.mmap):
+            # Lines still being iterated over keep the mapping alive, it is
+            # then closed once they are garbage collected.
+            with contextlib.suppress(BufferError):
+                buffer.close()
+
+    @property
+    def _starts(self):
+        # The offset at which every line starts, followed by the size of the
+        # buffer (so that line ``i`` spans from ``starts[i]`` to
+        # ``starts[i + 1]``), stored in a compact array.
+        if self._line_starts is None:
+            buffer = self.buffer
+            starts = array.array("Q", [0])
+            starts.extend(m.end() for m in self.NEWLINE_REGEX.finditer(buffer))
+            if starts[-1] != len(buffer):
+                starts.append(len(buffer))
+            self.builds["lines"] += 1
+            self._line_starts = starts
+        return self._line_starts
+
+    @property
+    def line_count(self):
+        return len(self._starts) - 1
+
+    def line(self, i):
+        """Returns the bytes of line ``i`` (including its new line)."""
+        starts = self._starts
+        if i < 0:
+            i += len(starts) - 1
+        if not 0 <= i < len(starts) - 1:
+            raise IndexError(f"Line index out of range: {i}")
+        return self.buffer[starts[i] : starts[i + 1]]
+
+    def line_number(self, offset):
+        """Returns the (1-based) number of the line containing ``offset``."""
+        return bisect.bisect_right(self._starts, offset)
 
     def lines_iter(self, remove_trailing_newline=True):
-        self._read()
-        for line in self._lines:
-            line = str(line, encoding=self.encoding)
-            if remove_trailing_newline:
-                # Cope with various OS new line conventions
-                line = line.removesuffix("\n")
-                line = line.removesuffix("\r")
-            yield line
+        # Lines are decoded from slices of the buffer, which are not copies
+        # of it when the file is memory mapped.
+        starts = self._starts
+        view = memoryview(self.buffer)
+        try:
+            for i in range(len(starts) - 1):
+                start = starts[i]
+                end = starts[i + 1]
+                if remove_trailing_newline:
+                    # Cope with various OS new line conventions
+                    if end > start and view[end - 1] == NEWLINE:
+                        end -= 1
+                    if end > start and view[end - 1] == CARRIAGE_RETURN:
+                        end -= 1
+                yield str(view[start:end], encoding=self.encoding)
+        finally:
+            view.release()
 
     @property
     def lines(self):
-        self._read()
-        return self._lines
+        """The bytes of every line (including its new line)."""
+        return Lines(self)
 
     @property
     def extension(self):
@@ -114,21 +350,57 @@ class ParsedFile:
         return self._encoding
 
     @property
-    def raw_contents(self):
+    def buffer(self):
+        """The bytes of the file, memory mapped for large files."""
         self._read()
-        return self._raw_content
+        return self._buffer
+
+    @property
+    def raw_contents(self):
+        return bytes(self.buffer)
+
+    @property
+    def digest(self):
+        if self._digest is None:
+            self._digest = hashlib.sha256(self.buffer).hexdigest()
+        return self._digest
 
     @property
     def contents(self):
         if self._content is None:
-            self._content = str(self.raw_contents, encoding=self.encoding)
+            self._content = str(self.buffer, encoding=self.encoding)
         return self._content
 
     def __str__(self):
-        return f"{self.filename} ({self.encoding}, {len(self.contents)} chars, {len(list(self.lines_iter()))} lines)"
+        return f"{self.filename} ({self.encoding}, {len(self.contents)} chars, {self.line_count} lines)"
 
 
 def parse(filename, encoding=None, default_extension=""):
     if not os.path.isfile(filename):
         raise OSError(errno.ENOENT, "File not found", filename)
     return ParsedFile(filename, encoding=encoding, default_extension=default_extension)
+
+
+def parse_bytes(filename, data, encoding=None, default_extension=""):
+    """Parses contents that are already in memory instead of a file.
+
+    The ``filename`` is only used to report errors (and to find the extension
+    of the contents), it does not need to exist.
+    """
+    return ParsedFile(
+        filename,
+        encoding=encoding,
+        default_extension=default_extension,
+        data=data,
+    )
+
+
+def parse_text(filename, text, encoding=None, default_extension=""):
+    """Like ``parse_bytes``, with the ``text`` encoded using ``encoding``."""
+    encoding = encoding or ParsedFile.FALLBACK_ENCODING
+    return parse_bytes(
+        filename,
+        text.encode(encoding),
+        encoding=encoding,
+        default_extension=default_extension,
+    )
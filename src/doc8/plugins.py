@@ -0,0 +1,236 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Checks provided by plugins, through the ``doc8.extension.check`` group.
+
+Finding the entry points of that group means reading the metadata of every
+installed distribution, so what was found (along with what each check
+reports and the extensions it applies to) is kept in a manifest in the
+cache directory. The manifest is reused as long as the distributions found
+on the import path and the modules of the checks do not change, and the
+checks it lists are only imported once a file needs them.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+
+from doc8 import cache, utils, version
+
+inspect = utils.lazy_import("inspect")
+metadata = utils.lazy_import("importlib.metadata")
+
+LOG = logging.getLogger(__name__)
+
+NAMESPACE = "doc8.extension.check"
+MANIFEST_FILENAME = "plugins.json"
+# Changed whenever what the manifest holds changes.
+MANIFEST_FORMAT = 1
+METADATA_SUFFIXES = (".dist-info", ".egg-info")
+
+
+def _distributions(path):
+    # The metadata directories of the distributions found in ``path``, which
+    # are renamed when they are upgraded and change when they are installed
+    # again, along with their modification time.
+    try:
+        with os.scandir(path or os.curdir) as it:
+            return sorted(
+                (entry.name, entry.stat().st_mtime_ns)
+                for entry in it
+                if entry.name.endswith(METADATA_SUFFIXES)
+            )
+    except OSError:
+        return None
+
+
+def environment_fingerprint():
+    """Returns a digest identifying the distributions that can be imported."""
+    entries = [(path, _distributions(path)) for path in sys.path]
+    blob = json.dumps([sys.executable, sys.version, version.__version__, entries])
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def resolve(entry):
+    """Imports what the entry point of a manifest ``entry`` refers to."""
+    return metadata.EntryPoint(entry["name"], entry["value"], NAMESPACE).load()
+
+
+def describe(name, value, obj):
+    """Returns the manifest entry of an entry point that loaded ``obj``.
+
+    Only classes can be imported later on, what is known of a check before
+    it is imported comes from the attributes of its class.
+    """
+    entry = {"name": name, "value": value, "lazy": False}
+    if not isinstance(obj, type):
+        return entry
+    source = cache.source_version(obj)
+    if source is None:
+        return entry
+    ext_matcher = getattr(obj, "EXT_MATCHER", None)
+    reports = getattr(obj, "REPORTS", None)
+    artifacts = getattr(obj, "ARTIFACTS", None)
+    check_version = getattr(obj, "VERSION", None)
+    entry.update({
+        "lazy": True,
+        "check_name": f"{obj.__module__}.{obj.__name__}",
+        "source": inspect.getfile(obj),
+        "source_version": source,
+        "version": source if check_version is None else str(check_version),
+        "ext_matcher": (
+            None if ext_matcher is None else [ext_matcher.pattern, ext_matcher.flags]
+        ),
+        "reports": None if reports is None else sorted(reports),
+        "artifacts": None if artifacts is None else sorted(artifacts),
+    })
+    return entry
+
+
+def scan():
+    """Loads the entry points of the plugins, returns their manifest entries.
+
+    The second value returned is false when some of them could not be loaded
+    (which is logged), the manifest is then not worth keeping.
+    """
+    entries = []
+    complete = True
+    for entry_point in metadata.entry_points(group=NAMESPACE):
+        try:
+            obj = entry_point.load()
+        except Exception:  # pylint: disable=broad-except
+            LOG.exception("Could not load %r", entry_point.name)
+            complete = False
+            continue
+        entries.append(describe(entry_point.name, entry_point.value, obj))
+    return entries, complete
+
+
+class Manifest:
+    """The plugins found in an environment, stored in ``cache_dir``."""
+
+    def __init__(self, cache_dir):
+        self._path = os.path.join(cache_dir, MANIFEST_FILENAME)
+
+    @classmethod
+    def from_config(cls, cfg):
+        """Returns the manifest configured by ``cfg`` (or none if disabled)."""
+        cache_dir = cfg.get("cache_dir")
+        if not cache_dir or not cfg.get("cache", True):
+            return None
+        return cls(os.path.abspath(cache_dir))
+
+    def load(self, fingerprint):
+        """Returns the entries of the manifest, ``None`` when out of date."""
+        try:
+            with open(self._path, encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        try:
+            if data["format"] != MANIFEST_FORMAT or data["fingerprint"] != fingerprint:
+                return None
+            entries = data["entries"]
+            for entry in entries:
+                if entry["lazy"] and not self._is_current(entry):
+                    return None
+        except (KeyError, TypeError):
+            LOG.debug("Ignoring malformed plugin manifest %s", self._path)
+            return None
+        return entries
+
+    @staticmethod
+    def _is_current(entry):
+        # The module of a check may change without the import path changing
+        # (like with editable installs).
+        try:
+            stat = os.stat(entry["source"])
+        except OSError:
+            return False
+        return f"{stat.st_size}:{stat.st_mtime_ns}" == entry["source_version"]
+
+    def store(self, fingerprint, entries):
+        data = {
+            "format": MANIFEST_FORMAT,
+            "fingerprint": fingerprint,
+            "entries": entries,
+        }
+        directory = os.path.dirname(self._path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(data, fh)
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            LOG.debug("Unable to write plugin manifest %s: %s", self._path, e)
+
+
+class LazyCheck:
+    """Stands for the check of a plugin until it is needed.
+
+    It has the attributes of the check that tell which files it applies to
+    (as recorded in the manifest), the check itself is only imported (and
+    created) by ``load``.
+    """
+
+    def __init__(self, entry, cfg):
+        self.name = entry["check_name"]
+        self.VERSION = entry["version"]
+        if entry["ext_matcher"] is not None:
+            self.EXT_MATCHER = re.compile(*entry["ext_matcher"])
+        if entry["reports"] is not None:
+            self.REPORTS = frozenset(entry["reports"])
+        if entry["artifacts"] is not None:
+            self.ARTIFACTS = frozenset(entry["artifacts"])
+        self._entry = entry
+        self._cfg = cfg
+        self._check = None
+
+    def load(self):
+        if self._check is None:
+            self._check = resolve(self._entry)(self._cfg)
+        return self._check
+
+
+def _create(entry, cfg):
+    # Returns ``None`` (once logged) when the check can not be created.
+    try:
+        if entry["lazy"]:
+            return LazyCheck(entry, cfg)
+        return resolve(entry)(cfg)
+    except Exception:  # pylint: disable=broad-except
+        LOG.exception("Could not load %r", entry["name"])
+        return None
+
+
+def fetch_checks(cfg):
+    """Returns the checks provided by plugins.
+
+    The checks that are classes are given as ``LazyCheck`` objects, which
+    only import them once they are used.
+    """
+    manifest = Manifest.from_config(cfg)
+    entries = None
+    if manifest is not None:
+        fingerprint = environment_fingerprint()
+        entries = manifest.load(fingerprint)
+    if entries is None:
+        entries, complete = scan()
+        if manifest is not None and complete:
+            manifest.store(fingerprint, entries)
+    created = (_create(entry, cfg.copy()) for entry in entries)
+    return [check for check in created if check is not None]
@@ -0,0 +1,137 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Reporters writing the errors found to a stream as soon as they are found.
+
+Errors are not kept once written, so reporting many of them does not use
+more memory, and the output of the machine readable formats is valid once
+the run is over (``finish`` writes what closes it).
+"""
+
+import abc
+import json
+import os
+import pathlib
+import urllib.parse
+
+from doc8 import version
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_VERSION = "2.1.0"
+INFORMATION_URI = "https://github.com/PyCQA/doc8"
+
+
+class Reporter(abc.ABC):
+    """Writes the errors found to ``stream`` (a text stream)."""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def start(self):  # noqa: B027
+        """Called before the first error is reported."""
+
+    # pylint: disable=too-many-positional-arguments
+    @abc.abstractmethod
+    def error(self, check_name, filename, line_num, code, message):
+        pass
+
+    def finish(self, _result):
+        """Called once every error was reported, with the ``Result``."""
+        self._stream.flush()
+
+
+class TextReporter(Reporter):
+    """One ``filename:line_num: code message`` line per error."""
+
+    # pylint: disable=too-many-positional-arguments
+    def error(self, _check_name, filename, line_num, code, message):
+        self._stream.write(f"{filename}:{line_num}: {code} {message}\n")
+
+
+def _line(line_num):
+    # Lines that are not known are reported as ``?``.
+    return line_num if isinstance(line_num, int) else None
+
+
+class JsonLinesReporter(Reporter):
+    """One JSON object per error (and per line)."""
+
+    # pylint: disable=too-many-positional-arguments
+    def error(self, check_name, filename, line_num, code, message):
+        data = {
+            "check": check_name,
+            "path": filename,
+            "line": _line(line_num),
+            "code": code,
+            "message": message,
+        }
+        self._stream.write(json.dumps(data) + "\n")
+
+
+def file_uri(filename):
+    """Returns the URI of ``filename``, relative ones stay relative."""
+    if os.path.isabs(filename):
+        return pathlib.Path(filename).as_uri()
+    return urllib.parse.quote(filename.replace(os.sep, "/"))
+
+
+class SarifReporter(Reporter):
+    """A SARIF log with a single run, written one result at a time."""
+
+    def __init__(self, stream):
+        super().__init__(stream)
+        self._results = 0
+
+    def start(self):
+        driver = {
+            "name": "doc8",
+            "version": version.__version__,
+            "informationUri": INFORMATION_URI,
+        }
+        head = {
+            "$schema": SARIF_SCHEMA,
+            "version": SARIF_VERSION,
+            "runs": [{"tool": {"driver": driver}, "results": []}],
+        }
+        # Everything up to the (still open) list of results.
+        text = json.dumps(head)
+        self._stream.write(text[: -len("]}]}")])
+
+    # pylint: disable=too-many-positional-arguments
+    def error(self, check_name, filename, line_num, code, message):
+        location = {"artifactLocation": {"uri": file_uri(filename)}}
+        line = _line(line_num)
+        if line is not None and line > 0:
+            location["region"] = {"startLine": line}
+        data = {
+            "ruleId": code,
+            # Invalid documents are errors, the style issues are warnings.
+            "level": "error" if code == "D000" else "warning",
+            "message": {"text": message},
+            "locations": [{"physicalLocation": location}],
+            "properties": {"check": check_name},
+        }
+        if self._results:
+            self._stream.write(",")
+        self._stream.write(json.dumps(data))
+        self._results += 1
+
+    def finish(self, result):
+        self._stream.write("]}]}\n")
+        super().finish(result)
+
+
+REPORTERS = {
+    "text": TextReporter,
+    "jsonl": JsonLinesReporter,
+    "sarif": SarifReporter,
+}
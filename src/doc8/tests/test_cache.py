@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from doc8 import cache, checks
+from doc8.main import doc8
+
+CONTENT = "Title\n=====\n\n%s\n\nTrailing \n" % " ".join(["word"] * 20)
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.docs = os.path.join(self.root, "docs")
+        self.cache_dir = os.path.join(self.root, "cache")
+        os.mkdir(self.docs)
+        with open(os.path.join(self.docs, "a.rst"), "w", encoding="utf-8") as fh:
+            fh.write(CONTENT)
+
+    def run_doc8(self, **kwargs):
+        kwargs.setdefault("cache_dir", self.cache_dir)
+        return doc8(paths=[self.docs], **kwargs)
+
+    def test_unchanged_file__replayed_without_running_checks(self):
+        first = self.run_doc8()
+        self.assertEqual(first.total_errors, 2)
+        with (
+            patch.object(checks.CheckValidity, "report_iter") as validity,
+            patch.object(checks.CheckMaxLineLength, "report_iter") as length,
+        ):
+            second = self.run_doc8()
+            validity.assert_not_called()
+            length.assert_not_called()
+        self.assertEqual(second.errors, first.errors)
+        self.assertEqual(second.error_counts, first.error_counts)
+
+    def test_config_change__checks_run_again(self):
+        self.run_doc8()
+        with patch.object(checks.CheckMaxLineLength, "report_iter") as length:
+            length.return_value = iter(())
+            result = self.run_doc8(max_line_length=40)
+            length.assert_called_once()
+        self.assertEqual(result.total_errors, 1)
+
+    def test_new_check_version__only_that_check_runs(self):
+        self.run_doc8()
+        with (
+            patch.object(checks.CheckValidity, "report_iter") as validity,
+            patch.object(checks.CheckMaxLineLength, "VERSION", "2", create=True),
+        ):
+            result = self.run_doc8()
+            validity.assert_not_called()
+        self.assertEqual(result.total_errors, 2)
+
+    def test_included_file_changed__checks_run_again(self):
+        with open(os.path.join(self.docs, "a.rst"), "w", encoding="utf-8") as fh:
+            fh.write("Title\n=====\n\n.. include:: ../part.inc\n")
+        part = os.path.join(self.root, "part.inc")
+        with open(part, "w", encoding="utf-8") as fh:
+            fh.write("Some text.\n")
+        self.assertEqual(self.run_doc8().total_errors, 0)
+        with open(part, "w", encoding="utf-8") as fh:
+            fh.write("Some *text.\n")
+        result = self.run_doc8()
+        self.assertEqual(result.error_counts["doc8.checks.CheckValidity"], 1)
+
+    def test_no_cache__cache_not_used(self):
+        self.run_doc8(cache=False)
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_prune__least_recently_used_entries_evicted(self):
+        result_cache = cache.ResultCache(self.cache_dir, {})
+        for i in range(5):
+            key = "%02d" % i + "0" * 62
+            result_cache.store(key, {"check": ["1", [[1, "D000", "x" * 20]]]})
+            path = os.path.join(self.cache_dir, key[:2], key + ".json")
+            os.utime(path, ns=(i, i))
+        entry_size = os.path.getsize(path)
+        result_cache = cache.ResultCache(self.cache_dir, {}, max_size=2 * entry_size)
+        result_cache.prune()
+        remaining = sorted(
+            name for _root, _dirs, files in os.walk(self.cache_dir) for name in files
+        )
+        self.assertEqual(len(remaining), 2)
+        self.assertTrue(remaining[0].startswith("03"))
@@ -11,33 +11,38 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+import random
 import tempfile
 import unittest
 
-from doc8 import checks, parser
+from doc8 import checks, parser, utils
 
 
 class TestTrailingWhitespace(unittest.TestCase):
     def test_trailing(self):
-        lines = ["a b  ", "ab"]
+        content = b"a b  \nab"
         check = checks.CheckTrailingWhitespace({})
-        errors = []
-        for line in lines:
-            errors.extend(check.report_iter(line))
+        errors = list(check.report_iter(content))
         self.assertEqual(1, len(errors))
-        (code, msg) = errors[0]
+        (offset, code, msg) = errors[0]
+        self.assertEqual(4, offset)
         self.assertIn(code, check.REPORTS)
 
+    def test_unicode_whitespace(self):
+        content = "a\u00a0\r\nb\u3000\rc\u2028".encode()
+        check = checks.CheckTrailingWhitespace({})
+        errors = list(check.report_iter(content))
+        self.assertEqual([1, 6, 11], [offset for offset, _c, _m in errors])
+
 
 class TestTabIndentation(unittest.TestCase):
     def test_tabs(self):
-        lines = ["    b", "\tabc", "efg", "\t\tc"]
+        content = b"    b\n\tabc\nefg\n \t\tc\rd\te"
         check = checks.CheckIndentationNoTab({})
-        errors = []
-        for line in lines:
-            errors.extend(check.report_iter(line))
+        errors = list(check.report_iter(content))
         self.assertEqual(2, len(errors))
-        (code, msg) = errors[0]
+        self.assertEqual([6, 15], [offset for offset, _c, _m in errors])
+        (offset, code, msg) = errors[0]
         self.assertIn(code, check.REPORTS)
 
 
@@ -46,15 +51,11 @@ class TestCarriageReturn(unittest.TestCase):
         content = b"Windows line ending\r\nLegacy Mac line ending\r"
         content += (b"a" * 79) + b"\r\n" + b"\r"
         conf = {"max_line_length": 79}
-        with tempfile.NamedTemporaryFile() as fh:
-            fh.write(content)
-            fh.flush()
-            parsed_file = parser.ParsedFile(fh.name)
-            check = checks.CheckCarriageReturn(conf)
-            errors = list(check.report_iter(parsed_file))
-            self.assertEqual(4, len(errors))
-            (line, code, msg) = errors[0]
-            self.assertIn(code, check.REPORTS)
+        check = checks.CheckCarriageReturn(conf)
+        errors = list(check.report_iter(content))
+        self.assertEqual(4, len(errors))
+        (offset, code, msg) = errors[0]
+        self.assertIn(code, check.REPORTS)
 
 
 class TestLineLength(unittest.TestCase):
@@ -163,6 +164,94 @@ test
             errors = list(check.report_iter(parsed_file))
             self.assertEqual(0, len(errors))
 
+    def test_short_lines__document_not_built(self):
+        conf = {"max_line_length": 79, "allow_long_titles": False}
+        for content, expected_builds in [
+            (b"Title\n=====\n\nShort *text*.\n", 0),
+            (b"Title\n=====\n\n" + b"long text " * 10 + b"\n", 1),
+        ]:
+            with tempfile.NamedTemporaryFile(suffix=".rst") as fh:
+                fh.write(content)
+                fh.flush()
+
+                parsed_file = parser.ParsedFile(fh.name)
+                check = checks.CheckMaxLineLength(conf)
+                errors = list(check.report_iter(parsed_file))
+                self.assertEqual(expected_builds, len(errors))
+                self.assertEqual(expected_builds, parsed_file.builds["document"])
+
+    def test_used_artifacts__document_only_for_long_lines(self):
+        conf = {"max_line_length": 10, "allow_long_titles": False}
+        check = checks.CheckMaxLineLength(conf)
+        for filename, content, expected in [
+            ("a.rst", "Short.\nLines.\n", {"lines"}),
+            ("a.rst", "Short.\nA longer line.\n", {"lines", "document"}),
+            ("a.rst", "\u00e9" * 10 + "\n", {"lines", "document"}),
+            ("a.txt", "Short.\nA longer line.\n", {"lines"}),
+        ]:
+            parsed_file = parser.parse_text(filename, content)
+            self.assertEqual(expected, check.used_artifacts(parsed_file))
+
+    def test_directive_regions(self):
+        lines = [
+            "Title",
+            "",
+            ".. note::",
+            "",
+            "   .. code-block:: text",
+            "",
+            "      body",
+            "paragraph",
+            "term",
+            "  definition",
+            "::",
+            "",
+            "  literal",
+            "",
+            "* item",
+            "  continued",
+        ]
+        check = checks.CheckMaxLineLength({
+            "max_line_length": 79,
+            "allow_long_titles": False,
+        })
+        # pylint: disable=protected-access
+        self.assertEqual(
+            [(2, 6), (8, 8), (10, 13)],
+            check._extract_directives(lines),
+        )
+
+
+class TestNodeSpanIndex(unittest.TestCase):
+    @staticmethod
+    def brute_force(nodes_lines, num):
+        contained_in = [
+            (n, line_max - line_min)
+            for n, (line_min, line_max) in nodes_lines
+            if line_min <= num <= line_max
+        ]
+        if not contained_in:
+            return []
+        smallest_span = min(span for _n, span in contained_in)
+        return [n for n, span in contained_in if span == smallest_span]
+
+    def test_matches_linear_scan(self):
+        rng = random.Random(0)  # noqa: S311
+        for _ in range(50):
+            nodes_lines = []
+            for n in range(rng.randint(0, 40)):
+                line_min = rng.randint(0, 60)
+                nodes_lines.append((n, (line_min, line_min + rng.randint(0, 20))))
+            index = utils.NodeSpanIndex(nodes_lines)
+            # Mostly increasing (like the checks) with some going back.
+            queries = sorted(rng.randint(0, 90) for _ in range(30))
+            queries += [rng.randint(0, 90) for _ in range(5)]
+            for num in queries:
+                self.assertEqual(
+                    index.smallest_spanning(num),
+                    self.brute_force(nodes_lines, num),
+                )
+
 
 class TestNewlineEndOfFile(unittest.TestCase):
     def test_newline(self):
@@ -175,11 +264,7 @@ class TestNewlineEndOfFile(unittest.TestCase):
             (0, b"testing\r"),
         ]
 
-        for expected_errors, line in tests:
-            with tempfile.NamedTemporaryFile() as fh:
-                fh.write(line)
-                fh.flush()
-                parsed_file = parser.ParsedFile(fh.name)
-                check = checks.CheckNewlineEndOfFile({})
-                errors = list(check.report_iter(parsed_file))
-                self.assertEqual(expected_errors, len(errors))
+        for expected_errors, content in tests:
+            check = checks.CheckNewlineEndOfFile({})
+            errors = list(check.report_iter(content))
+            self.assertEqual(expected_errors, len(errors))
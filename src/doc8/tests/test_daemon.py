@@ -0,0 +1,102 @@
+import base64
+import contextlib
+import functools
+import io
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from doc8 import daemon, main
+
+
+def run(func, argv):
+    out = io.StringIO()
+    err = io.StringIO()
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+        status = func(argv)
+    return {"status": status, "stdout": out.getvalue(), "stderr": err.getvalue()}
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        for name, text in [("a.rst", "Title\n=====\n\ntext \n"), ("b.txt", "ok\n")]:
+            with open(os.path.join(self.root, name), "w", encoding="utf-8") as fh:
+                fh.write(text)
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        self.addCleanup(os.chdir, cwd)
+        self.socket_path = os.path.join(self.root, "doc8.sock")
+
+    def test_handle__same_output_as_doc8(self):
+        serve = functools.partial(main.main, session=main.Session())
+        with patch.object(
+            main.CheckPlan,
+            "from_config",
+            wraps=main.CheckPlan.from_config,
+        ) as from_config:
+            responses = [
+                daemon.handle({"argv": argv, "cwd": self.root}, serve)
+                for argv in (["a.rst"], [], ["a.rst"], ["-q", "--max-line-length=3"])
+            ]
+        self.assertEqual(from_config.call_count, 2)
+        for argv, response in zip(
+            (["a.rst"], [], ["a.rst"], ["-q", "--max-line-length=3"]),
+            responses,
+            strict=True,
+        ):
+            self.assertEqual(response, run(main.main, argv))
+        self.assertEqual(responses[0]["status"], 1)
+
+    def test_handle__usage_error(self):
+        serve = functools.partial(main.main, session=main.Session())
+        response = daemon.handle({"argv": ["--watch"], "cwd": self.root}, serve)
+        self.assertEqual(response["status"], 2)
+        self.assertIn("can not be used through the daemon", response["stderr"])
+
+    def test_handle__stdin_sent_with_request(self):
+        serve = functools.partial(main.main, session=main.Session())
+        request = {"argv": ["-"], "cwd": self.root}
+        text = base64.b64encode(b"Title\n=====\n\ntext \n").decode("ascii")
+        daemon_stdin = io.TextIOWrapper(io.BytesIO(b"text \n"), encoding="utf-8")
+        with patch("sys.stdin", daemon_stdin):
+            sent = daemon.handle(dict(request, stdin=text), serve)
+            not_sent = daemon.handle(request, serve)
+        self.assertEqual(sent["status"], 1)
+        self.assertIn("<stdin>:4: D002 Trailing whitespace", sent["stdout"])
+        self.assertEqual(not_sent["status"], 0)
+        self.assertEqual(daemon_stdin.tell(), 0)
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets are not available")
+    def test_client__served_by_daemon(self):
+        served = []
+
+        def serve(argv):
+            if argv == ["stop"]:
+                raise KeyboardInterrupt
+            served.append(argv)
+            return main.main(argv, session=main.Session())
+
+        thread = threading.Thread(target=daemon.serve, args=(self.socket_path, serve))
+        thread.start()
+        try:
+            while not os.path.exists(self.socket_path):
+                thread.join(0.01)
+            response = run(daemon.client_main, ["--socket", self.socket_path])
+        finally:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.connect(self.socket_path)
+                client.sendall(b'{"argv": ["stop"], "cwd": "."}\n')
+            thread.join()
+        self.assertEqual(served, [["--socket", self.socket_path]])
+        self.assertEqual(response, run(main.main, []))
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def test_client__no_daemon__runs_locally(self):
+        response = run(daemon.client_main, ["--socket", self.socket_path, "a.rst"])
+        self.assertEqual(response, run(main.main, ["a.rst"]))
@@ -0,0 +1,209 @@
+import io
+import json
+import os
+import threading
+import time
+import unittest
+
+from doc8 import lsp
+from doc8.main import get_defaults, resolve_config, serve_language_server
+
+
+def encode(message):
+    body = json.dumps(message).encode("utf-8")
+    return b"Content-Length: %d\r\n\r\n" % len(body) + body
+
+
+class Output(io.BytesIO):
+    """Collects the messages written by the server."""
+
+    def messages(self):
+        stream = io.BytesIO(self.getvalue())
+        messages = []
+        while True:
+            message = lsp.read_message(stream)
+            if message is None:
+                return messages
+            messages.append(message)
+
+
+class Client:
+    def __init__(self, serve):
+        read_fd, write_fd = os.pipe()
+        self.stdin = os.fdopen(read_fd, "rb")
+        self._writer = os.fdopen(write_fd, "wb")
+        self.stdout = Output()
+        self.exit_code = None
+
+        def run():
+            self.exit_code = serve(self.stdin, self.stdout)
+
+        self._thread = threading.Thread(target=run)
+        self._thread.start()
+
+    def send(self, method, params=None, message_id=None):
+        message = {"jsonrpc": "2.0", "method": method, "params": params or {}}
+        if message_id is not None:
+            message["id"] = message_id
+        self._writer.write(encode(message))
+        self._writer.flush()
+
+    def diagnostics(self, count=1):
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            published = [
+                m["params"]
+                for m in self.stdout.messages()
+                if m.get("method") == "textDocument/publishDiagnostics"
+            ]
+            if len(published) >= count:
+                return published
+            time.sleep(0.01)
+        msg = "No diagnostics were published"
+        raise AssertionError(msg)
+
+    def stop(self):
+        self.send("shutdown", message_id=99)
+        self.send("exit")
+        self._thread.join()
+        self._writer.close()
+        self.stdin.close()
+
+
+class TestApplyChange(unittest.TestCase):
+    def test_incremental_changes(self):
+        text = "first\r\nsecond 😀 line\nthird"
+
+        def change(start, end, new_text):
+            return {
+                "range": {
+                    "start": {"line": start[0], "character": start[1]},
+                    "end": {"line": end[0], "character": end[1]},
+                },
+                "text": new_text,
+            }
+
+        # The emoji is two UTF-16 code units long.
+        text = lsp.apply_change(text, change((1, 7), (1, 9), "smile"))
+        self.assertEqual(text, "first\r\nsecond smile line\nthird")
+        text = lsp.apply_change(text, change((0, 5), (1, 0), " "))
+        self.assertEqual(text, "first second smile line\nthird")
+        text = lsp.apply_change(text, change((1, 5), (1, 5), "\n"))
+        self.assertEqual(text, "first second smile line\nthird\n")
+        self.assertEqual(lsp.apply_change(text, {"text": "new"}), "new")
+
+
+class TestLanguageServer(unittest.TestCase):
+    URI = "file:///docs/index.rst"
+
+    def test_changes__debounced(self):
+        linted = []
+
+        def lint(path, text):
+            linted.append((path, text))
+            return [(1, "X001", "Found")]
+
+        server = lsp.LanguageServer(lint, delay=0.2)
+        client = Client(server.serve)
+        client.send("initialize", message_id=1)
+        client.send(
+            "textDocument/didOpen",
+            {"textDocument": {"uri": self.URI, "text": "a", "version": 1}},
+        )
+        for i in range(2, 6):
+            client.send(
+                "textDocument/didChange",
+                {
+                    "textDocument": {"uri": self.URI, "version": i},
+                    "contentChanges": [
+                        {
+                            "range": {
+                                "start": {"line": 0, "character": i - 1},
+                                "end": {"line": 0, "character": i - 1},
+                            },
+                            "text": "b",
+                        },
+                    ],
+                },
+            )
+        [published] = client.diagnostics()
+        client.stop()
+        self.assertEqual(client.exit_code, 0)
+        self.assertEqual(linted, [(os.path.normpath("/docs/index.rst"), "abbbb")])
+        self.assertEqual(published["version"], 5)
+        self.assertEqual(
+            published["diagnostics"],
+            [
+                {
+                    "range": {
+                        "start": {"line": 0, "character": 0},
+                        "end": {"line": 0, "character": 5},
+                    },
+                    "severity": lsp.SEVERITY_WARNING,
+                    "code": "X001",
+                    "source": "doc8",
+                    "message": "Found",
+                },
+            ],
+        )
+        responses = {m["id"]: m for m in client.stdout.messages() if "id" in m}
+        self.assertIn("capabilities", responses[1]["result"])
+        self.assertIsNone(responses[99]["result"])
+
+    def test_lint_error__no_diagnostics(self):
+        def lint(_path, text):
+            if text == "fails":
+                msg = "Check failed"
+                raise RuntimeError(msg)
+            return [(1, "X001", "Found")]
+
+        server = lsp.LanguageServer(lint, delay=0)
+        client = Client(server.serve)
+        with self.assertLogs(lsp.LOG) as logs:
+            client.send(
+                "textDocument/didOpen",
+                {"textDocument": {"uri": self.URI, "text": "fails", "version": 1}},
+            )
+            client.diagnostics()
+        client.send(
+            "textDocument/didChange",
+            {
+                "textDocument": {"uri": self.URI, "version": 2},
+                "contentChanges": [{"text": "works"}],
+            },
+        )
+        published = client.diagnostics(count=2)
+        client.stop()
+        self.assertEqual(client.exit_code, 0)
+        self.assertIn("Unable to validate", logs.output[0])
+        self.assertEqual(
+            [(p["version"], len(p["diagnostics"])) for p in published],
+            [(1, 0), (2, 1)],
+        )
+
+    def test_serve__buffer_validated(self):
+        cfg = resolve_config(get_defaults())
+
+        def serve(stdin, stdout):
+            return serve_language_server(cfg, stdin, stdout)
+
+        client = Client(serve)
+        client.send(
+            "textDocument/didOpen",
+            {
+                "textDocument": {
+                    "uri": self.URI,
+                    "text": "Title\n=====\n\ntext \n\tindented\n",
+                    "version": 1,
+                },
+            },
+        )
+        [published] = client.diagnostics()
+        client.stop()
+        self.assertEqual(
+            [
+                (d["code"], d["range"]["start"]["line"])
+                for d in published["diagnostics"]
+            ],
+            [("D002", 3), ("D003", 4)],
+        )
@@ -1,11 +1,29 @@
+import json
 import os
 import shutil
+import subprocess  # noqa: S404
 import sys
 import unittest
-from io import StringIO
+from io import BytesIO, StringIO, TextIOWrapper
 from unittest.mock import MagicMock, patch
 
-from doc8.main import doc8, from_toml, main
+import pytest
+
+from doc8 import checks
+from doc8.main import (
+    CheckPlan,
+    Result,
+    Session,
+    doc8,
+    fetch_checks,
+    from_toml,
+    get_defaults,
+    lint_text,
+    main,
+    scan,
+    validate,
+)
+from doc8.parser import ParsedFile
 
 # Location to create test files
 TMPFS_DIR_NAME = ".tmp"
@@ -38,6 +56,13 @@ OUTPUT_CMD_VERBOSE = """\
 Scanning...
   Selecting '{path}/invalid.rst'
 Validating...
+Check plan:
+  - doc8.checks.CheckValidity (reports D000, on extensions matching '(.*)[.]rst', uses errors)
+  - doc8.checks.CheckTrailingWhitespace (reports D002, uses buffer)
+  - doc8.checks.CheckIndentationNoTab (reports D003, uses buffer)
+  - doc8.checks.CheckCarriageReturn (reports D004, uses buffer)
+  - doc8.checks.CheckMaxLineLength (reports D001, uses lines, document)
+  - doc8.checks.CheckNewlineEndOfFile (reports D005, uses buffer)
 Validating {path}/invalid.rst (utf-8, 10 chars, 1 lines)
   Running check 'doc8.checks.CheckValidity'
   Running check 'doc8.checks.CheckTrailingWhitespace'
@@ -47,6 +72,11 @@ Validating {path}/invalid.rst (utf-8, 10 chars, 1 lines)
   Running check 'doc8.checks.CheckMaxLineLength'
   Running check 'doc8.checks.CheckNewlineEndOfFile'
     - {path}/invalid.rst:1: D005 No newline at end of file
+Artifacts built:
+  - buffer = 1
+  - lines = 1
+  - errors = 1
+  - document = 0
 ========
 Total files scanned = 1
 Total files ignored = 0
@@ -76,6 +106,15 @@ Detailed error counts:
     - doc8.checks.CheckValidity = 0"""
 
 
+def spy_expect_artifacts():
+    """Patches ``ParsedFile.expect_artifacts`` to find the files checked."""
+    return patch(
+        "doc8.parser.ParsedFile.expect_artifacts",
+        autospec=True,
+        side_effect=ParsedFile.expect_artifacts,
+    )
+
+
 class Capture:
     """Context manager to capture output on stdout and stderr"""
 
@@ -132,6 +171,17 @@ class FakeResult:
         return ""
 
 
+class FakeScan:
+    """Minimum valid scan returned from doc8.main.scan"""
+
+    files_selected = 0
+    files_ignored = 0
+    dirs_ignored = 0
+
+    def __iter__(self):
+        return iter(())
+
+
 class TestCommandLine(unittest.TestCase):
     """Test command line invocation"""
 
@@ -171,6 +221,55 @@ class TestCommandLine(unittest.TestCase):
             self.assertEqual(err.getvalue(), "")
         self.assertEqual(state, 1)
 
+    def test_main__format_sarif__only_the_log_printed(self):
+        with (
+            TmpFs() as tmpfs,
+            Capture() as (out, err),
+            patch("argparse._sys.argv", ["doc8", "--format", "sarif", tmpfs.path]),
+        ):
+            tmpfs.mock()
+            state = main()
+            [run] = json.loads(out.getvalue())["runs"]
+            self.assertEqual(
+                [result["ruleId"] for result in run["results"]],
+                ["D002", "D005"],
+            )
+            self.assertEqual(err.getvalue(), "")
+        self.assertEqual(state, 1)
+
+    def test_main__format_from_config__jsonl_printed(self):
+        with TmpFs() as tmpfs, Capture() as (out, err):
+            tmpfs.mock()
+            tmpfs.create_file("doc8.ini", "[doc8]\nformat = jsonl\n")
+            config = os.path.join(tmpfs.path, "doc8.ini")
+            state = main(["--config", config, os.path.join(tmpfs.path, "invalid.rst")])
+            self.assertEqual(
+                [json.loads(line)["code"] for line in out.getvalue().splitlines()],
+                ["D002", "D005"],
+            )
+            self.assertEqual(err.getvalue(), "")
+        self.assertEqual(state, 1)
+
+    def test_main__changed_lines_only_without_diff_base__usage_error(self):
+        with Capture() as (out, err), pytest.raises(SystemExit) as raised:
+            main(["--changed-lines-only", "."])
+        self.assertEqual(raised.value.code, 2)
+        self.assertIn("--changed-lines-only requires --diff-base", err.getvalue())
+
+    def test_main__stdin__document_read_from_stdin(self):
+        with (
+            Capture() as (out, err),
+            patch("sys.stdin", TextIOWrapper(BytesIO(b"D002 D005 "), encoding="utf-8")),
+            patch("argparse._sys.argv", ["doc8", "--quiet", "-"]),
+        ):
+            state = main()
+            self.assertEqual(
+                out.getvalue(),
+                OUTPUT_CMD_QUIET.format(path="<stdin>").replace("/invalid.rst", ""),
+            )
+            self.assertEqual(err.getvalue(), "")
+        self.assertEqual(state, 1)
+
 
 class TestApi(unittest.TestCase):
     """Test direct code invocation"""
@@ -204,6 +303,238 @@ class TestApi(unittest.TestCase):
             self.assertEqual(err.getvalue(), "")
         self.assertEqual(result.total_errors, 2)
 
+    def test_doc8__args__errors_printed(self):
+        with TmpFs() as tmpfs, Capture() as (out, err):
+            tmpfs.mock()
+            args = get_defaults()
+            args.update(paths=[tmpfs.path], quiet=True)
+            result = doc8(args)
+            self.assertEqual(out.getvalue(), tmpfs.expected(OUTPUT_CMD_QUIET))
+            self.assertEqual(err.getvalue(), "")
+        self.assertEqual(result.total_errors, 2)
+
+    def test_lint_text__same_result_as_file(self):
+        with TmpFs() as tmpfs, Capture() as (out, err):
+            tmpfs.mock()
+            expected = doc8(paths=[tmpfs.path])
+            filename = os.path.join(tmpfs.path, "invalid.rst")
+            os.remove(filename)
+            result = lint_text("D002 D005 ", filename=filename)
+
+            self.assertEqual(result.errors, expected.errors)
+            self.assertEqual(result.report(), expected.report())
+            self.assertEqual(out.getvalue(), "")
+            self.assertEqual(err.getvalue(), "")
+
+    def test_doc8__jobs__same_result_as_serial(self):
+        with TmpFs() as tmpfs, Capture() as (out, err):
+            for i in range(8):
+                tmpfs.create_file(
+                    "file%s.rst" % i,
+                    "Title\n=====\n\n%s\ttab \n" % ("word " * (i * 5)),
+                )
+            serial = doc8(paths=[tmpfs.path])
+            parallel = doc8(paths=[tmpfs.path], jobs=3)
+
+            self.assertEqual(parallel.errors, serial.errors)
+            self.assertEqual(parallel.error_counts, serial.error_counts)
+            self.assertEqual(parallel.report(), serial.report())
+            self.assertEqual(out.getvalue(), "")
+            self.assertEqual(err.getvalue(), "")
+        self.assertEqual(serial.files_selected, 8)
+
+    def test_doc8__many_files__checks_fetched_once(self):
+        with (
+            TmpFs() as tmpfs,
+            patch("doc8.main.fetch_checks", wraps=fetch_checks) as mock_fetch,
+        ):
+            for i in range(3):
+                tmpfs.create_file("file%s.rst" % i, "text \n")
+            tmpfs.create_file("file.txt", "text \n")
+            result = doc8(paths=[tmpfs.path])
+        mock_fetch.assert_called_once()
+        self.assertEqual(result.total_errors, 4)
+
+    def test_validate__line_checks__lines_read_once(self):
+        class CheckA(checks.LineCheck):
+            REPORTS = frozenset(["X001"])
+
+            def report_iter(self, line):
+                if "a" in line:
+                    yield ("X001", "Found a")
+
+        class CheckB(checks.LineCheck):
+            REPORTS = frozenset(["X002"])
+
+            def report_iter(self, line):
+                if "b" in line:
+                    yield ("X002", "Found b")
+
+        with (
+            TmpFs() as tmpfs,
+            Capture(),
+            patch(
+                "doc8.parser.ParsedFile.lines_iter",
+                autospec=True,
+                side_effect=ParsedFile.lines_iter,
+            ) as mock_lines_iter,
+        ):
+            tmpfs.create_file("file.rst", "a\nb\nab\n")
+            cfg = get_defaults()
+            cfg.update(paths=[tmpfs.path], ignore_path_errors={}, quiet=True)
+            result = Result()
+            result.capture = True
+            plan = CheckPlan([CheckA(cfg), CheckB(cfg)])
+            validate(cfg, scan(cfg), result=result, plan=plan)
+        mock_lines_iter.assert_called_once()
+        self.assertEqual(
+            [(code, line_num) for _c, _f, line_num, code, _m in result.errors],
+            [("X001", 1), ("X001", 3), ("X002", 2), ("X002", 3)],
+        )
+
+    def test_doc8__buffer_checks__errors_on_the_right_lines(self):
+        with TmpFs() as tmpfs:
+            path = os.path.join(tmpfs.path, "file.txt")
+            with open(path, "wb") as fh:
+                fh.write(b"\tindented\r\nspace\xa0\rlast \nno newline")
+            result = doc8(paths=[tmpfs.path], file_encoding="latin-1")
+        self.assertEqual(
+            [(code, line_num) for _c, _f, line_num, code, _m in result.errors],
+            [
+                ("D002", 2),
+                ("D002", 3),
+                ("D003", 1),
+                ("D004", 1),
+                ("D004", 2),
+                ("D005", 4),
+            ],
+        )
+
+    def test_doc8__aliased_files__checked_once(self):
+        with TmpFs() as tmpfs, Capture():
+            tmpfs.create_file("a.rst", "a \n")
+            tmpfs.create_file("copy.rst", "a \n")
+            tmpfs.create_file("other.rst", "b \n")
+            os.link(
+                os.path.join(tmpfs.path, "a.rst"),
+                os.path.join(tmpfs.path, "hardlink.rst"),
+            )
+            os.symlink(
+                os.path.join(tmpfs.path, "a.rst"),
+                os.path.join(tmpfs.path, "link.rst"),
+            )
+            with spy_expect_artifacts() as mock_expect_artifacts:
+                serial = doc8(paths=[tmpfs.path])
+            parallel = doc8(paths=[tmpfs.path], jobs=2)
+        # The files reached through links and the copies are checked once.
+        self.assertEqual(mock_expect_artifacts.call_count, 2)
+        self.assertEqual(
+            sorted(os.path.basename(f) for _c, f, _l, _code, _m in serial.errors),
+            ["a.rst", "copy.rst", "hardlink.rst", "link.rst", "other.rst"],
+        )
+        self.assertEqual(parallel.errors, serial.errors)
+        self.assertEqual(serial.files_selected, 5)
+
+    def test_doc8__target_before_symbolic_link__checked_once(self):
+        with TmpFs() as tmpfs, Capture():
+            tmpfs.create_file("a.rst", "a \n")
+            target = os.path.join(tmpfs.path, "a.rst")
+            link = os.path.join(tmpfs.path, "link.rst")
+            os.symlink(target, link)
+            with spy_expect_artifacts() as mock_expect_artifacts:
+                serial = doc8(paths=[target, link])
+            parallel = doc8(paths=[target, link], jobs=2)
+        self.assertEqual(mock_expect_artifacts.call_count, 1)
+        self.assertEqual(
+            [f for _c, f, _l, _code, _m in serial.errors],
+            [target, link],
+        )
+        self.assertEqual(parallel.errors, serial.errors)
+
+    def test_validate__many_duplicates__outcomes_kept_bounded(self):
+        with TmpFs() as tmpfs, Capture():
+            for name in ("a", "b", "c"):
+                tmpfs.create_file(name + ".rst", name + " \n")
+                tmpfs.create_file(name + "-copy.rst", name + " \n")
+            with (
+                patch("doc8.main.MAX_KEPT_OUTCOMES", 1),
+                spy_expect_artifacts() as mock_expect_artifacts,
+            ):
+                serial = doc8(paths=[tmpfs.path])
+                parallel = doc8(paths=[tmpfs.path], jobs=2, max_in_flight=2)
+        # Each copy is found next to its original (in walk order).
+        self.assertEqual(mock_expect_artifacts.call_count, 3)
+        self.assertEqual(serial.total_errors, 6)
+        self.assertEqual(parallel.errors, serial.errors)
+
+    def test_doc8__ignored_directory__counted_apart_from_files(self):
+        with TmpFs() as tmpfs, Capture():
+            tmpfs.create_file("a.rst", "a\n")
+            tmpfs.create_file("b.rst", "b\n")
+            os.mkdir(os.path.join(tmpfs.path, "build"))
+            tmpfs.create_file(os.path.join("build", "c.rst"), "c\n")
+            result = doc8(
+                paths=[tmpfs.path],
+                ignore_path=[
+                    os.path.join(tmpfs.path, "b.rst"),
+                    os.path.join(tmpfs.path, "build"),
+                ],
+            )
+        self.assertEqual(result.files_selected, 1)
+        self.assertEqual(result.files_ignored, 1)
+        self.assertEqual(result.dirs_ignored, 1)
+        self.assertIn(
+            "Total files ignored = 1\nTotal directories ignored = 1\n",
+            result.report(),
+        )
+
+    def test_doc8__file_insertion__checked_in_each_directory(self):
+        with TmpFs() as tmpfs, Capture():
+            for directory in ("a", "b"):
+                os.mkdir(os.path.join(tmpfs.path, directory))
+                tmpfs.create_file(
+                    os.path.join(directory, "x.rst"),
+                    "Title\n=====\n\n.. include:: inc.rst\n",
+                )
+            tmpfs.create_file(os.path.join("b", "inc.rst"), "Included.\n")
+            result = doc8(paths=[tmpfs.path])
+        self.assertEqual(
+            [os.path.relpath(f, tmpfs.path) for _c, f, _l, _code, _m in result.errors],
+            [os.path.join("a", "x.rst")],
+        )
+
+    def test_doc8__session__outcomes_of_same_contents_reused(self):
+        session = Session()
+        with TmpFs() as tmpfs, Capture():
+            tmpfs.create_file("a.rst", "a \n")
+            tmpfs.create_file("copy.rst", "a \n")
+            with spy_expect_artifacts() as mock_expect_artifacts:
+                first = doc8(paths=[tmpfs.path], session=session)
+                second = doc8(paths=[tmpfs.path], session=session)
+        self.assertEqual(mock_expect_artifacts.call_count, 1)
+        self.assertEqual(first.total_errors, 2)
+        self.assertEqual(second.errors, first.errors)
+
+    def test_validate__streams_files__errors_reported_before_next_file(self):
+        with TmpFs() as tmpfs, Capture() as (out, err):
+            tmpfs.create_file("a.rst", "a ")
+            tmpfs.create_file("b.rst", "b ")
+            cfg = get_defaults()
+            cfg.update(paths=[tmpfs.path], ignore_path_errors={}, quiet=True)
+            result = Result()
+            result.capture = True
+            seen = []
+
+            def files():
+                for f in scan(cfg):
+                    seen.append(len(result.errors))
+                    yield f
+
+            validate(cfg, files(), result=result)
+            self.assertEqual(seen, [0, 2])
+            self.assertEqual(result.total_errors, 4)
+            self.assertEqual(out.getvalue(), "")
+
     def test_doc8__verbose__verbose_overridden(self):
         with TmpFs() as tmpfs, Capture() as (out, err):
             tmpfs.mock()
@@ -219,58 +550,33 @@ class TestArguments(unittest.TestCase):
     """Test that arguments are parsed correctly"""
 
     def get_args(self, **kwargs):
-        # Defaults
-        args = {
-            "paths": [os.getcwd()],
-            "config": [],
-            "allow_long_titles": False,
-            "ignore": set(),
-            "sphinx": True,
-            "ignore_path": [],
-            "ignore_path_errors": {},
-            "default_extension": "",
-            "file_encoding": "",
-            "max_line_length": 79,
-            "extension": list([".rst", ".txt"]),
-            "quiet": False,
-            "verbose": False,
-            "version": False,
-        }
+        # Defaults, as the command line parses them.
+        args = get_defaults()
+        args.update(ignore=set(), ignore_path_errors={})
         args.update(kwargs)
         return args
 
     def test_get_args__override__value_overridden(self):
         # Just checking a dict is a dict, but confirms nothing silly has happened
         # so we can make assumptions about get_args in other tests
+        args = self.get_args(paths=["/tmp/does/not/exist"])
+        self.assertEqual(args["paths"], ["/tmp/does/not/exist"])
+        self.assertEqual(args["max_line_length"], 79)
+        self.assertEqual(args["extension"], [".rst", ".txt"])
         self.assertEqual(
-            self.get_args(paths=["/tmp/does/not/exist"]),
-            {
-                "paths": ["/tmp/does/not/exist"],
-                "config": [],
-                "allow_long_titles": False,
-                "ignore": set(),
-                "sphinx": True,
-                "ignore_path": [],
-                "ignore_path_errors": {},
-                "default_extension": "",
-                "file_encoding": "",
-                "max_line_length": 79,
-                "extension": [".rst", ".txt"],
-                "quiet": False,
-                "verbose": False,
-                "version": False,
-            },
+            {key: value for key, value in args.items() if key != "paths"},
+            {key: value for key, value in self.get_args().items() if key != "paths"},
         )
 
     def test_args__no_args__defaults(self):
-        mock_scan = MagicMock(return_value=([], 0))
+        mock_scan = MagicMock(return_value=FakeScan())
         with patch("doc8.main.scan", mock_scan), patch("argparse._sys.argv", ["doc8"]):
             state = main()
             self.assertEqual(state, 0)
             mock_scan.assert_called_once_with(self.get_args())
 
     def test_args__paths__overrides_default(self):
-        mock_scan = MagicMock(return_value=([], 0))
+        mock_scan = MagicMock(return_value=FakeScan())
         with (
             patch("doc8.main.scan", mock_scan),
             patch("argparse._sys.argv", ["doc8", "path1", "path2"]),
@@ -280,7 +586,7 @@ class TestArguments(unittest.TestCase):
             mock_scan.assert_called_once_with(self.get_args(paths=["path1", "path2"]))
 
     def test_args__config__overrides_default(self):
-        mock_scan = MagicMock(return_value=([], 0))
+        mock_scan = MagicMock(return_value=FakeScan())
         mock_config = MagicMock(return_value={})
         with (
             patch("doc8.main.scan", mock_scan),
@@ -295,7 +601,7 @@ class TestArguments(unittest.TestCase):
             mock_scan.assert_called_once_with(self.get_args(config=["path1", "path2"]))
 
     def test_args__allow_long_titles__overrides_default(self):
-        mock_scan = MagicMock(return_value=([], 0))
+        mock_scan = MagicMock(return_value=FakeScan())
         with (
             patch("doc8.main.scan", mock_scan),
             patch("argparse._sys.argv", ["doc8", "--allow-long-titles"]),
@@ -305,7 +611,7 @@ class TestArguments(unittest.TestCase):
             mock_scan.assert_called_once_with(self.get_args(allow_long_titles=True))
 
     def test_args__ignore__overrides_default(self):
-        mock_scan = MagicMock(return_value=([], 0))
+        mock_scan = MagicMock(return_value=FakeScan())
         with (
             patch("doc8.main.scan", mock_scan),
             patch(
@@ -318,7 +624,7 @@ class TestArguments(unittest.TestCase):
             mock_scan.assert_called_once_with(self.get_args(ignore={"D002", "D005"}))
 
     def test_args__sphinx__overrides_default(self):
-        mock_scan = MagicMock(return_value=([], 0))
+        mock_scan = MagicMock(return_value=FakeScan())
         with (
             patch("doc8.main.scan", mock_scan),
             patch("argparse._sys.argv", ["doc8", "--no-sphinx"]),
@@ -328,7 +634,7 @@ class TestArguments(unittest.TestCase):
             mock_scan.assert_called_once_with(self.get_args(sphinx=False))
 
     def test_args__ignore_path__overrides_default(self):
-        mock_scan = MagicMock(return_value=([], 0))
+        mock_scan = MagicMock(return_value=FakeScan())
         with (
             patch("doc8.main.scan", mock_scan),
             patch(
@@ -343,7 +649,7 @@ class TestArguments(unittest.TestCase):
             )
 
     def test_args__ignore_path_errors__overrides_default(self):
-        mock_scan = MagicMock(return_value=([], 0))
+        mock_scan = MagicMock(return_value=FakeScan())
         with (
             patch("doc8.main.scan", mock_scan),
             patch(
@@ -366,7 +672,7 @@ class TestArguments(unittest.TestCase):
             )
 
     def test_args__default_extension__overrides_default(self):
-        mock_scan = MagicMock(return_value=([], 0))
+        mock_scan = MagicMock(return_value=FakeScan())
         with (
             patch("doc8.main.scan", mock_scan),
             patch("argparse._sys.argv", ["doc8", "--default-extension", "rst"]),
@@ -376,7 +682,7 @@ class TestArguments(unittest.TestCase):
             mock_scan.assert_called_once_with(self.get_args(default_extension="rst"))
 
     def test_args__file_encoding__overrides_default(self):
-        mock_scan = MagicMock(return_value=([], 0))
+        mock_scan = MagicMock(return_value=FakeScan())
         with (
             patch("doc8.main.scan", mock_scan),
             patch("argparse._sys.argv", ["doc8", "--file-encoding", "utf8"]),
@@ -386,7 +692,7 @@ class TestArguments(unittest.TestCase):
             mock_scan.assert_called_once_with(self.get_args(file_encoding="utf8"))
 
     def test_args__max_line_length__overrides_default(self):
-        mock_scan = MagicMock(return_value=([], 0))
+        mock_scan = MagicMock(return_value=FakeScan())
         with (
             patch("doc8.main.scan", mock_scan),
             patch("argparse._sys.argv", ["doc8", "--max-line-length", "88"]),
@@ -397,7 +703,7 @@ class TestArguments(unittest.TestCase):
 
     def test_args__extension__overrides_default(self):
         # ": [".rst", ".txt"],
-        mock_scan = MagicMock(return_value=([], 0))
+        mock_scan = MagicMock(return_value=FakeScan())
         with (
             patch("doc8.main.scan", mock_scan),
             patch(
@@ -411,8 +717,40 @@ class TestArguments(unittest.TestCase):
                 self.get_args(extension=[".rst", ".txt", "ext1", "ext2"]),
             )
 
+    def test_args__jobs__overrides_default(self):
+        mock_scan = MagicMock(return_value=FakeScan())
+        with (
+            patch("doc8.main.scan", mock_scan),
+            patch("argparse._sys.argv", ["doc8", "--jobs", "4"]),
+        ):
+            state = main()
+            self.assertEqual(state, 0)
+            mock_scan.assert_called_once_with(self.get_args(jobs=4))
+
+    def test_args__cache_dir__overrides_default(self):
+        mock_scan = MagicMock(return_value=FakeScan())
+        # Where the plugins found are recorded.
+        self.addCleanup(shutil.rmtree, "path1", ignore_errors=True)
+        with (
+            patch("doc8.main.scan", mock_scan),
+            patch("argparse._sys.argv", ["doc8", "--cache-dir", "path1"]),
+        ):
+            state = main()
+            self.assertEqual(state, 0)
+            mock_scan.assert_called_once_with(self.get_args(cache_dir="path1"))
+
+    def test_args__no_cache__overrides_default(self):
+        mock_scan = MagicMock(return_value=FakeScan())
+        with (
+            patch("doc8.main.scan", mock_scan),
+            patch("argparse._sys.argv", ["doc8", "--no-cache"]),
+        ):
+            state = main()
+            self.assertEqual(state, 0)
+            mock_scan.assert_called_once_with(self.get_args(cache=False))
+
     def test_args__quiet__overrides_default(self):
-        mock_scan = MagicMock(return_value=([], 0))
+        mock_scan = MagicMock(return_value=FakeScan())
         with (
             patch("doc8.main.scan", mock_scan),
             patch("argparse._sys.argv", ["doc8", "--quiet"]),
@@ -422,7 +760,7 @@ class TestArguments(unittest.TestCase):
             mock_scan.assert_called_once_with(self.get_args(quiet=True))
 
     def test_args__verbose__overrides_default(self):
-        mock_scan = MagicMock(return_value=([], 0))
+        mock_scan = MagicMock(return_value=FakeScan())
         with (
             patch("doc8.main.scan", mock_scan),
             patch("argparse._sys.argv", ["doc8", "--verbose"]),
@@ -432,7 +770,7 @@ class TestArguments(unittest.TestCase):
             mock_scan.assert_called_once_with(self.get_args(verbose=True))
 
     def test_args__version__overrides_default(self):
-        mock_scan = MagicMock(return_value=([], 0))
+        mock_scan = MagicMock(return_value=FakeScan())
         with (
             patch("doc8.main.scan", mock_scan),
             patch("argparse._sys.argv", ["doc8", "--version"]),
@@ -478,3 +816,33 @@ class TestConfig(unittest.TestCase):
         self.assertEqual(cfg["max_line_length"], 80)
         self.assertEqual(cfg["file_encoding"], "utf8")
         self.assertEqual(cfg["sphinx"], False)
+
+
+class TestStartup(unittest.TestCase):
+    # Modules that only some runs need, they are imported once used.
+    DEFERRED_MODULES = (
+        "concurrent.futures",
+        "doc8.checks",
+        "doc8.daemon",
+        "doc8.parser",
+        "docutils",
+        "importlib.metadata",
+        "restructuredtext_lint",
+    )
+
+    def test_version__heavy_modules_not_imported(self):
+        process = subprocess.run(  # noqa: S603
+            [sys.executable, "-X", "importtime", "-m", "doc8", "--version"],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        # Modules loaded lazily are only listed once they are executed.
+        imported = {
+            line.rsplit("|", 1)[1].strip()
+            for line in process.stderr.splitlines()
+            if line.startswith("import time:")
+        }
+        self.assertIn("doc8.main", imported)
+        for name in self.DEFERRED_MODULES:
+            self.assertNotIn(name, imported)
@@ -0,0 +1,169 @@
+import mmap
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import restructuredtext_lint as rl
+from docutils.parsers import rst
+
+from doc8 import parser
+
+CONTENT = b"""\
+Title
+=====
+
+Some *text* with `a reference`_ and an :unknown:`role`.
+
+.. code-block:: python
+
+   print("hello")
+
+.. unknown-directive::
+
+   content
+"""
+
+
+def describe(document):
+    return [
+        (type(node).__name__, node.line, node.source, node.astext())
+        for node in document.findall()
+    ]
+
+
+class TestParsedFile(unittest.TestCase):
+    def parsed_file(self, content):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        filename = os.path.join(tmp_dir, "test.rst")
+        with open(filename, "wb") as fh:
+            fh.write(content)
+        return parser.ParsedFile(filename)
+
+    def test_errors_and_document__parsed_once(self):
+        parsed_file = self.parsed_file(CONTENT)
+        with patch.object(
+            rst.Parser,
+            "parse",
+            autospec=True,
+            side_effect=rst.Parser.parse,
+        ) as parse:
+            errors = parsed_file.errors
+            document = parsed_file.document
+            self.assertEqual(parse.call_count, 1)
+
+        expected_errors = rl.lint(parsed_file.contents, filepath=parsed_file.filename)
+        self.assertEqual(
+            [(e.line, e.level, e.message, e.full_message) for e in errors],
+            [(e.line, e.level, e.message, e.full_message) for e in expected_errors],
+        )
+        self.assertEqual(
+            describe(document),
+            describe(parser.ParsedFile(parsed_file.filename).document),
+        )
+
+    def test_document_not_expected__not_kept(self):
+        parsed_file = self.parsed_file(CONTENT)
+        parsed_file.expect_artifacts(["errors"])
+        self.assertTrue(parsed_file.errors)
+        self.assertEqual(parsed_file.builds["document"], 0)
+        with patch.object(
+            rst.Parser,
+            "parse",
+            autospec=True,
+            side_effect=rst.Parser.parse,
+        ) as parse:
+            self.assertIsNotNone(parsed_file.document)
+            self.assertEqual(parse.call_count, 1)
+        self.assertEqual(parsed_file.builds["document"], 1)
+        self.assertEqual(parsed_file.builds["errors"], 1)
+
+    def test_file_insertion__parsed_separately(self):
+        content = CONTENT + b"\n.. include:: does-not-exist.rst\n"
+        parsed_file = self.parsed_file(content)
+        with patch.object(
+            rst.Parser,
+            "parse",
+            autospec=True,
+            side_effect=rst.Parser.parse,
+        ) as parse:
+            errors = parsed_file.errors
+            document = parsed_file.document
+            self.assertEqual(parse.call_count, 2)
+
+        expected_errors = rl.lint(parsed_file.contents, filepath=parsed_file.filename)
+        self.assertEqual(
+            [(e.line, e.message) for e in errors],
+            [(e.line, e.message) for e in expected_errors],
+        )
+        self.assertEqual(
+            describe(document),
+            describe(parser.ParsedFile(parsed_file.filename).document),
+        )
+
+    def test_memory_mapped__same_contents(self):
+        content = b"first \r\nsecond\rthird\n\n\xc3\xa9 last"
+        parsed_file = self.parsed_file(content)
+        mapped_file = parser.ParsedFile(parsed_file.filename)
+        with patch.object(parser.ParsedFile, "MMAP_THRESHOLD", 1):
+            self.assertIsInstance(mapped_file.buffer, mmap.mmap)
+        self.assertIsInstance(parsed_file.buffer, bytes)
+
+        self.assertEqual(mapped_file.raw_contents, content)
+        self.assertEqual(list(mapped_file.lines), content.splitlines(True))
+        for remove_trailing_newline in (True, False):
+            self.assertEqual(
+                list(mapped_file.lines_iter(remove_trailing_newline)),
+                list(parsed_file.lines_iter(remove_trailing_newline)),
+            )
+        self.assertEqual(
+            list(parsed_file.lines_iter()),
+            ["first ", "second", "third", "", "é last"],
+        )
+        self.assertEqual(mapped_file.contents, parsed_file.contents)
+        self.assertEqual(mapped_file.digest, parsed_file.digest)
+
+        buffer = mapped_file.buffer
+        mapped_file.close()
+        self.assertTrue(buffer.closed)
+        self.assertEqual(mapped_file.raw_contents, content)
+
+    def test_closed__read_again(self):
+        parsed_file = self.parsed_file(b"first\nsecond\n")
+        self.assertEqual(parsed_file.contents, "first\nsecond\n")
+        self.assertEqual(parsed_file.line_count, 2)
+        parsed_file.close()
+        with open(parsed_file.filename, "wb") as fh:
+            fh.write(b"third\n")
+        self.assertEqual(parsed_file.contents, "third\n")
+        self.assertEqual(list(parsed_file.lines), [b"third\n"])
+        self.assertEqual(parsed_file.builds["buffer"], 2)
+
+    def test_lines__from_line_offsets(self):
+        content = b"first \r\nsecond\rthird\n\n\xc3\xa9 last"
+        parsed_file = self.parsed_file(content)
+        self.assertEqual(parsed_file.line_count, 5)
+        self.assertEqual(list(parsed_file.lines), content.splitlines(True))
+        self.assertEqual(parsed_file.lines[-1], b"\xc3\xa9 last")
+        self.assertEqual(parsed_file.lines[1:3], [b"second\r", b"third\n"])
+        self.assertEqual(parsed_file.line(0), b"first \r\n")
+        self.assertEqual(
+            [parsed_file.line_number(offset) for offset in (0, 7, 8, 21, 22, 28)],
+            [1, 1, 2, 4, 5, 5],
+        )
+
+    def test_lines__empty_file(self):
+        parsed_file = self.parsed_file(b"")
+        self.assertEqual(parsed_file.line_count, 0)
+        self.assertEqual(list(parsed_file.lines), [])
+        self.assertEqual(list(parsed_file.lines_iter()), [])
+
+    def test_in_memory__file_not_read(self):
+        parsed_file = parser.parse_text("/does/not/exist.rst", CONTENT.decode())
+        self.assertTrue(parsed_file.in_memory)
+        self.assertEqual(parsed_file.raw_contents, CONTENT)
+        self.assertEqual(len(parsed_file.errors), len(rl.lint(CONTENT.decode())))
+        parsed_file.close()
+        self.assertEqual(list(parsed_file.lines), CONTENT.splitlines(True))
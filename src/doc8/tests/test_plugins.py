@@ -0,0 +1,95 @@
+import importlib.metadata
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from doc8 import plugins
+from doc8.main import doc8
+
+MODULE = "doc8_test_plugin"
+PLUGIN = """\
+import re
+
+from doc8 import checks
+
+
+class CheckWord(checks.LineCheck):
+    REPORTS = frozenset(["X100"])
+    EXT_MATCHER = re.compile(r"(.*)[.]txt")
+
+    def report_iter(self, line):
+        if "word" in line:
+            yield ("X100", "Found word")
+"""
+
+
+class TestPlugins(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.cache_dir = os.path.join(self.root, "cache")
+        self.plugin_dir = os.path.join(self.root, "plugins")
+        os.mkdir(self.plugin_dir)
+        self.write(os.path.join(self.plugin_dir, MODULE + ".py"), PLUGIN)
+        for name in ("a.rst", "b.txt"):
+            self.write(os.path.join(self.root, name), "word\n")
+        patcher = patch.object(sys, "path", [*sys.path, self.plugin_dir])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(sys.modules.pop, MODULE, None)
+        entry_point = importlib.metadata.EntryPoint(
+            name="word",
+            value=MODULE + ":CheckWord",
+            group=plugins.NAMESPACE,
+        )
+        self.entry_points = patch.object(
+            plugins.metadata,
+            "entry_points",
+            return_value=[entry_point],
+        )
+
+    @staticmethod
+    def write(path, text):
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(text)
+
+    def run_doc8(self, name):
+        return doc8(paths=[os.path.join(self.root, name)], cache_dir=self.cache_dir)
+
+    def test_manifest__checks_imported_once_needed(self):
+        with self.entry_points as entry_points:
+            self.run_doc8("a.rst")
+            sys.modules.pop(MODULE)
+            rst = self.run_doc8("a.rst")
+            self.assertNotIn(MODULE, sys.modules)
+            txt = self.run_doc8("b.txt")
+            self.assertIn(MODULE, sys.modules)
+        entry_points.assert_called_once_with(group=plugins.NAMESPACE)
+        self.assertEqual(rst.total_errors, 0)
+        self.assertEqual(
+            txt.errors,
+            [
+                (
+                    MODULE + ".CheckWord",
+                    os.path.join(self.root, "b.txt"),
+                    1,
+                    "X100",
+                    "Found word",
+                ),
+            ],
+        )
+
+    def test_changed_plugin__found_again(self):
+        with self.entry_points as entry_points:
+            self.run_doc8("b.txt")
+            self.write(
+                os.path.join(self.plugin_dir, MODULE + ".py"),
+                PLUGIN.replace("X100", "X101") + "# Changed.\n",
+            )
+            sys.modules.pop(MODULE)
+            result = self.run_doc8("b.txt")
+        self.assertEqual(entry_points.call_count, 2)
+        self.assertEqual([e[3] for e in result.errors], ["X101"])
@@ -0,0 +1,95 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from doc8 import reporters
+from doc8.main import doc8
+
+ERRORS = [
+    ("doc8.checks.CheckValidity", "docs/a b.rst", "?", "D000", "Invalid"),
+    ("doc8.checks.CheckTrailingWhitespace", "/docs/b.rst", 3, "D002", "Trailing"),
+]
+
+
+def report(reporter_cls, errors):
+    stream = io.StringIO()
+    reporter = reporter_cls(stream)
+    reporter.start()
+    for error in errors:
+        reporter.error(*error)
+    reporter.finish(None)
+    return stream.getvalue()
+
+
+class TestReporters(unittest.TestCase):
+    def test_jsonl(self):
+        lines = report(reporters.JsonLinesReporter, ERRORS).splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [
+                {
+                    "check": "doc8.checks.CheckValidity",
+                    "path": "docs/a b.rst",
+                    "line": None,
+                    "code": "D000",
+                    "message": "Invalid",
+                },
+                {
+                    "check": "doc8.checks.CheckTrailingWhitespace",
+                    "path": "/docs/b.rst",
+                    "line": 3,
+                    "code": "D002",
+                    "message": "Trailing",
+                },
+            ],
+        )
+
+    def test_sarif(self):
+        log = json.loads(report(reporters.SarifReporter, ERRORS))
+        self.assertEqual(log["version"], "2.1.0")
+        [run] = log["runs"]
+        self.assertEqual(run["tool"]["driver"]["name"], "doc8")
+        self.assertEqual(
+            [
+                (
+                    result["ruleId"],
+                    result["level"],
+                    result["locations"][0]["physicalLocation"],
+                )
+                for result in run["results"]
+            ],
+            [
+                ("D000", "error", {"artifactLocation": {"uri": "docs/a%20b.rst"}}),
+                (
+                    "D002",
+                    "warning",
+                    {
+                        "artifactLocation": {"uri": "file:///docs/b.rst"},
+                        "region": {"startLine": 3},
+                    },
+                ),
+            ],
+        )
+
+    def test_sarif__no_errors__valid_log(self):
+        log = json.loads(report(reporters.SarifReporter, []))
+        self.assertEqual(log["runs"][0]["results"], [])
+
+    def test_doc8__reporter__errors_not_kept(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name in ("a.rst", "b.rst"):
+                with open(os.path.join(tmp_dir, name), "w", encoding="utf-8") as fh:
+                    fh.write("text \n")
+            stream = io.StringIO()
+            result = doc8(
+                paths=[tmp_dir],
+                reporter=reporters.JsonLinesReporter(stream),
+            )
+        self.assertEqual(result.errors, [])
+        self.assertEqual(result.total_errors, 2)
+        self.assertEqual(
+            sorted(json.loads(line)["path"] for line in stream.getvalue().splitlines()),
+            [os.path.join(tmp_dir, "a.rst"), os.path.join(tmp_dir, "b.rst")],
+        )
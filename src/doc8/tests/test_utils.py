@@ -0,0 +1,251 @@
+import os
+import shutil
+import subprocess  # noqa: S404
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pytest
+
+from doc8 import utils, vcs
+from doc8.main import main
+from doc8.tests.test_main import Capture
+
+
+class TestFindFiles(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        for path in [
+            "index.rst",
+            "notes.txt",
+            "script.py",
+            "guide/intro.rst",
+            "guide/deep/more.rst",
+            "_build/html/index.rst",
+            "_build/out.rst",
+        ]:
+            path = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write("text\n")
+
+    def find_files(self, ignored_paths, paths=None):
+        return [
+            (os.path.relpath(path, self.root), ignorable)
+            for path, ignorable in utils.find_files(
+                paths or [self.root],
+                [".rst", ".txt"],
+                [os.path.join(self.root, path) for path in ignored_paths],
+            )
+        ]
+
+    def test_walk__same_order_as_os_walk(self):
+        expected = []
+        for root, _dirnames, filenames in os.walk(self.root):
+            for filename in filenames:
+                if os.path.splitext(filename)[1] in {".rst", ".txt"}:
+                    path = os.path.join(root, filename)
+                    expected.append((os.path.relpath(path, self.root), False))
+        self.assertEqual(self.find_files([]), expected)
+
+    def test_ignored_directory__pruned(self):
+        with patch("os.scandir", wraps=os.scandir) as scandir:
+            found = self.find_files(["_build", "guide/intro.rst"])
+        scanned = [os.path.relpath(c.args[0], self.root) for c in scandir.mock_calls]
+        self.assertNotIn("_build", scanned)
+        self.assertNotIn(os.path.join("_build", "html"), scanned)
+        self.assertIn(("_build", True), found)
+        self.assertIn((os.path.join("guide", "intro.rst"), True), found)
+        self.assertEqual(
+            sorted(path for path, ignorable in found if not ignorable),
+            [os.path.join("guide", "deep", "more.rst"), "index.rst", "notes.txt"],
+        )
+
+    def test_path_in_ignored_directory__ignored(self):
+        guide = os.path.join(self.root, "guide")
+        self.assertEqual(
+            self.find_files(["guide"], paths=[os.path.join(guide, "deep")]),
+            [(os.path.join("guide", "deep"), True)],
+        )
+        self.assertEqual(
+            self.find_files(["guide"], paths=[os.path.join(guide, "intro.rst")]),
+            [(os.path.join("guide", "intro.rst"), True)],
+        )
+
+    def test_recursive_glob__pruned_at_any_depth(self):
+        found = self.find_files(["**/deep", "**/*.txt"])
+        self.assertEqual(
+            sorted(found),
+            [
+                (os.path.join("_build", "html", "index.rst"), False),
+                (os.path.join("_build", "out.rst"), False),
+                (os.path.join("guide", "deep"), True),
+                (os.path.join("guide", "intro.rst"), False),
+                ("index.rst", False),
+                ("notes.txt", True),
+            ],
+        )
+
+
+@unittest.skipIf(shutil.which("git") is None, "git is not available")
+class TestFindFilesGit(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        for path in [
+            ".gitignore",
+            "index.rst",
+            "deleted.rst",
+            "untracked.rst",
+            "guide/intro.rst",
+            "_build/out.rst",
+            "venv/lib/README.rst",
+        ]:
+            path = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write("venv/\n" if path.endswith(".gitignore") else "text\n")
+        self.git("init", "-q")
+        self.git("add", ".gitignore", "index.rst", "deleted.rst", "guide", "_build")
+        os.unlink(os.path.join(self.root, "deleted.rst"))
+
+    def git(self, *args):
+        subprocess.run(["git", *args], cwd=self.root, check=True)  # noqa: S603, S607
+
+    def find_files(self, ignored_paths, use_git=True):
+        return sorted(
+            (os.path.relpath(path, self.root), ignorable)
+            for path, ignorable in utils.find_files(
+                [self.root],
+                [".rst"],
+                [os.path.join(self.root, path) for path in ignored_paths],
+                use_git=use_git,
+            )
+        )
+
+    def test_git__files_known_to_git(self):
+        with patch("os.scandir") as scandir:
+            found = self.find_files(["_build"])
+        scandir.assert_not_called()
+        self.assertEqual(
+            found,
+            [
+                ("_build", True),
+                (os.path.join("guide", "intro.rst"), False),
+                ("index.rst", False),
+                ("untracked.rst", False),
+            ],
+        )
+
+    def test_not_a_repository__walked(self):
+        with patch("doc8.vcs.git_files", return_value=None):
+            found = self.find_files(["_build"])
+        self.assertEqual(found, self.find_files(["_build"], use_git=False))
+        self.assertIn((os.path.join("venv", "lib", "README.rst"), False), found)
+
+
+@unittest.skipIf(shutil.which("git") is None, "git is not available")
+class TestFindFilesGitChanges(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.write("index.rst", "one\ntwo\nthree\nfour\n")
+        self.write("unchanged.rst", "text\n")
+        self.write("removed.rst", "text\n")
+        self.write("guide/intro.rst", "text\n")
+        self.git("init", "-q")
+        self.git("add", ".")
+        self.git("commit", "-q", "-m", "Initial")
+        self.write("index.rst", "one\n2\nthree\nfour\nfive\nsix\n")
+        self.write("guide/intro.rst", "")
+        self.write("untracked.rst", "text\n")
+        os.unlink(os.path.join(self.root, "removed.rst"))
+
+    def write(self, path, text):
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(text)
+
+    def git(self, *args):
+        user = ("-c", "user.name=doc8", "-c", "user.email=doc8@localhost")
+        subprocess.run(["git", *user, *args], cwd=self.root, check=True)  # noqa: S603, S607
+
+    def test_changed_files__found(self):
+        changes = vcs.GitChanges("HEAD")
+        found = sorted(
+            os.path.relpath(path, self.root)
+            for path, _ignorable in utils.find_files(
+                [self.root, os.path.join(self.root, "unchanged.rst")],
+                [".rst"],
+                [],
+                changes=changes,
+            )
+        )
+        self.assertEqual(
+            found,
+            [os.path.join("guide", "intro.rst"), "index.rst", "untracked.rst"],
+        )
+        self.assertEqual(
+            changes.lines(os.path.join(self.root, "index.rst")),
+            [(2, 2), (5, 6)],
+        )
+        intro = os.path.join(self.root, "guide", "intro.rst")
+        self.assertEqual(changes.lines(intro), [])
+        self.assertIsNone(changes.lines(os.path.join(self.root, "untracked.rst")))
+        self.assertEqual(changes.lines(os.path.join(self.root, "unchanged.rst")), [])
+
+    def test_parse_diff__added_lines_like_headers(self):
+        diff = (
+            b"diff --git a/index.rst b/index.rst\n"
+            b"--- a/index.rst\n"
+            b"+++ b/index.rst\n"
+            b"@@ -2 +2,2 @@\n"
+            b"--- removed\n"
+            b"+++ added\n"
+            b"+two\n"
+            b"@@ -8,0 +9 @@\n"
+            b"+nine\n"
+        )
+        self.assertEqual(vcs.parse_diff(diff), {"index.rst": [(2, 3), (9, 9)]})
+
+    def test_unknown_reference__error(self):
+        changes = vcs.GitChanges("does-not-exist")
+        with pytest.raises(ValueError, match="does-not-exist"):
+            changes.files(self.root)
+        with pytest.raises(ValueError, match="Invalid git reference"):
+            vcs.GitChanges("--output=file")
+
+    def test_main__unknown_reference__usage_error(self):
+        with Capture() as (_out, err), pytest.raises(SystemExit) as raised:
+            main(["--diff-base", "does-not-exist", self.root])
+        self.assertEqual(raised.value.code, 2)
+        self.assertIn(
+            "Unable to find the changes of %s since does-not-exist" % self.root,
+            err.getvalue(),
+        )
+        self.assertNotIn("Traceback", err.getvalue())
+
+
+class TestPathMatcher(unittest.TestCase):
+    def test_matches__like_glob(self):
+        matcher = utils.PathMatcher([
+            "/docs/*.rst",
+            "/docs/**/_build",
+            "/other/[!a]?.txt",
+            "/literal[x]",
+        ])
+        for path, expected in [
+            ("/docs/index.rst", True),
+            ("/docs/.hidden.rst", False),
+            ("/docs/sub/index.rst", False),
+            ("/docs/_build", True),
+            ("/docs/a/b/_build", True),
+            ("/docs/.a/_build", False),
+            ("/other/ba.txt", True),
+            ("/other/ab.txt", False),
+            ("/literalx", True),
+            ("/literal[x]", False),
+        ]:
+            self.assertEqual(matcher.matches(path), expected, path)
@@ -0,0 +1,127 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from doc8 import watch
+from doc8.main import get_defaults
+from doc8.main import watch as watch_files
+from doc8.tests.test_main import spy_expect_artifacts
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(text)
+
+
+class FakeWatcher:
+    def __init__(self, changes):
+        self.changes = list(changes)
+        self.closed = False
+
+    def wait(self):
+        if not self.changes:
+            raise KeyboardInterrupt
+        change = self.changes.pop(0)
+        return change() if callable(change) else change
+
+    def close(self):
+        self.closed = True
+
+
+class TestWatchers(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.index = os.path.join(self.root, "index.rst")
+        write(self.index, "text\n")
+        write(os.path.join(self.root, "removed.rst"), "text\n")
+
+    def change_files(self):
+        write(self.index, "more text\n")
+        os.unlink(os.path.join(self.root, "removed.rst"))
+        write(os.path.join(self.root, "guide", "new.rst"), "text\n")
+
+    def list_files(self):
+        return [
+            os.path.join(root, name)
+            for root, _dirs, names in os.walk(self.root)
+            for name in names
+        ]
+
+    def test_polling__changed_files(self):
+        watcher = watch.PollingWatcher(self.list_files, interval=0)
+        self.change_files()
+        self.assertEqual(
+            watcher.wait(),
+            {
+                self.index,
+                os.path.join(self.root, "removed.rst"),
+                os.path.join(self.root, "guide", "new.rst"),
+            },
+        )
+
+    def test_inotify__changed_files(self):
+        watcher = watch.watcher([self.root], [], self.list_files)
+        self.addCleanup(watcher.close)
+        if not isinstance(watcher, watch.InotifyWatcher):
+            self.skipTest("inotify is not available")
+        self.change_files()
+        self.assertLessEqual(
+            {
+                self.index,
+                os.path.join(self.root, "removed.rst"),
+                os.path.join(self.root, "guide"),
+            },
+            watcher.wait(),
+        )
+        # New directories are watched too.
+        new = os.path.join(self.root, "guide", "new.rst")
+        write(new, "changed\n")
+        self.assertIn(new, watcher.wait())
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.cfg = get_defaults()
+        self.cfg.update(paths=[self.root], ignore_path_errors={}, quiet=True)
+
+    def test_watch__only_changed_files_validated(self):
+        a = os.path.join(self.root, "a.rst")
+        b = os.path.join(self.root, "b.rst")
+        write(a, "a \n")
+        write(b, "b\n")
+
+        def change():
+            write(b, "b \n")
+            return {b}
+
+        def remove():
+            os.unlink(a)
+            return {a}
+
+        watcher = FakeWatcher([change, remove])
+        with (
+            contextlib.redirect_stdout(io.StringIO()) as out,
+            spy_expect_artifacts() as mock_expect_artifacts,
+        ):
+            result = watch_files(self.cfg, watcher=watcher)
+        validated = [c.args[0].filename for c in mock_expect_artifacts.call_args_list]
+        self.assertEqual(sorted(validated[:2]), [a, b])
+        self.assertEqual(validated[2:], [b])
+        self.assertEqual(
+            sorted(out.getvalue().splitlines()),
+            [
+                f"{a}:1: D002 Trailing whitespace",
+                f"{b}:1: D002 Trailing whitespace",
+            ],
+        )
+        self.assertTrue(watcher.closed)
+        self.assertEqual(result.files_selected, 1)
+        errors = [(f, code) for _c, f, _l, code, _m in result.errors]
+        self.assertEqual(errors, [(b, "D002")])
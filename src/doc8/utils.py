@@ -13,45 +13,247 @@
 # under the License.
 
 import glob
+import heapq
+import importlib.util
+import itertools
 import os
+import re
+import sys
 
 
-def find_files(paths, extensions, ignored_paths):
+def lazy_import(name):
+    """Returns the module ``name``, which is only loaded once it is used.
+
+    Modules that are slow to import (or that only some runs need) are loaded
+    on the first access to one of their attributes, so that the runs which
+    never use them (like ``doc8 --version``) do not pay for them.
+    """
+    try:
+        return sys.modules[name]
+    except KeyError:
+        pass
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    parent, _dot, child = name.rpartition(".")
+    if parent:
+        # Like an import does, so that ``parent.child`` can be used.
+        setattr(sys.modules[parent], child, module)
+    return module
+
+
+vcs = lazy_import("doc8.vcs")
+
+
+class PathMatcher:
+    """Matches absolute paths against glob patterns.
+
+    Patterns are relative to the current directory and are compiled (once)
+    into a single regular expression. Like with ``glob``, ``*``, ``?`` and
+    ``[...]`` match within a path segment without matching hidden names
+    (unless the pattern segment starts with a dot) and ``**`` matches any
+    number of segments.
+    """
+
+    _MAGIC_REGEX = re.compile(r"[*?[]")
+
+    def __init__(self, patterns):
+        self._literals = set()
+        regexes = []
+        # The current directory is not part of the patterns, so it must not
+        # be taken for one when it contains special characters.
+        cwd = glob.escape(os.getcwd())
+        for pattern in patterns:
+            path = os.path.normcase(os.path.normpath(os.path.join(cwd, pattern)))
+            if self._MAGIC_REGEX.search(path):
+                regexes.append(self._translate(path))
+            else:
+                self._literals.add(path)
+        self._regex = None
+        if regexes:
+            self._regex = re.compile("|".join(regexes), re.DOTALL)
+
+    @classmethod
+    def _translate(cls, path):
+        sep = re.escape(os.sep)
+        segment = r"(?!\.)[^%s]+" % sep
+        segments = path.split(os.sep)
+        regex = ""
+        for i, part in enumerate(segments):
+            last = i == len(segments) - 1
+            if part == "**":
+                if last:
+                    regex = regex.removesuffix(sep) + f"(?:{sep}{segment})*"
+                else:
+                    regex += f"(?:{segment}{sep})*"
+            else:
+                regex += cls._translate_segment(part)
+                if not last:
+                    regex += sep
+        return f"(?:{regex})"
+
+    @classmethod
+    def _translate_segment(cls, part):
+        if not cls._MAGIC_REGEX.search(part):
+            return re.escape(part)
+        not_sep = "[^%s]" % re.escape(os.sep)
+        regex = "" if part.startswith(".") else r"(?!\.)"
+        i = 0
+        while i < len(part):
+            c = part[i]
+            i += 1
+            if c == "*":
+                if not regex.endswith(not_sep + "*"):
+                    regex += not_sep + "*"
+            elif c == "?":
+                regex += not_sep
+            elif c == "[":
+                j = i
+                if j < len(part) and part[j] == "!":
+                    j += 1
+                if j < len(part) and part[j] == "]":
+                    j += 1
+                while j < len(part) and part[j] != "]":
+                    j += 1
+                if j >= len(part):
+                    regex += re.escape(c)
+                    continue
+                chars = re.sub(r"([\\&~|^\[])", r"\\\1", part[i:j])
+                i = j + 1
+                if chars.startswith("!"):
+                    regex += "[^%s%s]" % (re.escape(os.sep), chars[1:])
+                else:
+                    regex += "[%s]" % chars
+            else:
+                regex += re.escape(c)
+        return regex
+
+    def matches(self, path):
+        """Returns whether the (absolute) ``path`` matches any pattern."""
+        path = os.path.normcase(path)
+        if path in self._literals:
+            return True
+        return self._regex is not None and self._regex.fullmatch(path) is not None
+
+    def matches_ancestry(self, path):
+        """Returns whether ``path`` (or a directory containing it) matches."""
+        path = os.path.abspath(path)
+        while True:
+            if self.matches(path):
+                return True
+            parent = os.path.dirname(path)
+            if parent == path:
+                return False
+            path = parent
+
+
+def find_files(paths, extensions, ignored_paths, use_git=False, changes=None):
+    """Yields ``(path, ignorable)`` for the files to check under ``paths``.
+
+    Ignored directories are not walked into, each of them is yielded once
+    (as ignorable) instead of the files it contains. When ``use_git`` is
+    true the files of directories that are part of a git repository are
+    the ones git knows about (and does not ignore) instead. When
+    ``changes`` (a :class:`doc8.vcs.GitChanges`) is given only the files
+    it reports as changed are found.
+    """
     extensions = set(extensions)
-    ignored_absolute_paths = set()
-    for path in ignored_paths:
-        for expanded_path in glob.iglob(path):
-            expanded_path = os.path.abspath(expanded_path)
-            ignored_absolute_paths.add(expanded_path)
+    ignored = PathMatcher(ignored_paths)
 
     def extension_matches(path):
         _base, ext = os.path.splitext(path)
         return ext in extensions
 
-    def path_ignorable(path):
-        path = os.path.abspath(path)
-        if path in ignored_absolute_paths:
-            return True
-        last_path = None
-        while path != last_path:
-            # If we hit the root, this loop will stop since the resolution
-            # of "/../" is still "/" when ran through the abspath function...
-            last_path = path
-            path = os.path.abspath(os.path.join(path, os.path.pardir))
-            if path in ignored_absolute_paths:
-                return True
-        return False
+    def walk(top):
+        # Same (top-down) order as ``os.walk``, symbolic links to directories
+        # are not followed either. Only the path of the directories (which
+        # are known to not be ignored) is checked against the ignored paths.
+        stack = [(top, os.path.abspath(top))]
+        while stack:
+            dir_path, abs_dir_path = stack.pop()
+            try:
+                with os.scandir(dir_path) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            dir_entries = []
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    dir_entries.append(entry)
+                elif extension_matches(entry.name):
+                    abs_path = os.path.join(abs_dir_path, entry.name)
+                    yield (entry.path, ignored.matches(abs_path))
+            sub_dirs = []
+            for entry in dir_entries:
+                if entry.is_symlink():
+                    continue
+                abs_path = os.path.join(abs_dir_path, entry.name)
+                if ignored.matches(abs_path):
+                    yield (entry.path, True)
+                else:
+                    sub_dirs.append((entry.path, abs_path))
+            stack.extend(reversed(sub_dirs))
+
+    def listed(top, relative_paths):
+        abs_top = os.path.abspath(top)
+        # The outermost ignored directory containing each directory (relative
+        # to the top one), or ``None`` when none of them is ignored.
+        ignored_dirs = {"": None}
+
+        def ignored_dir(rel_dir):
+            try:
+                return ignored_dirs[rel_dir]
+            except KeyError:
+                pass
+            found = ignored_dir(os.path.dirname(rel_dir))
+            if found is None and ignored.matches(os.path.join(abs_top, rel_dir)):
+                found = rel_dir
+            ignored_dirs[rel_dir] = found
+            return found
+
+        reported_dirs = set()
+        for rel_path in relative_paths:
+            if not extension_matches(rel_path):
+                continue
+            rel_dir = ignored_dir(os.path.dirname(rel_path))
+            if rel_dir is not None:
+                if rel_dir not in reported_dirs:
+                    reported_dirs.add(rel_dir)
+                    yield (os.path.join(top, rel_dir), True)
+                continue
+            path = os.path.join(top, rel_path)
+            # Skip the files deleted since they were added to the index (as
+            # well as links to directories and submodules).
+            if os.path.isfile(path):
+                yield (path, ignored.matches(os.path.join(abs_top, rel_path)))
 
     for path in paths:
         if os.path.isfile(path):
-            if extension_matches(path):
-                yield (path, path_ignorable(path))
+            if extension_matches(path) and (changes is None or path in changes):
+                yield (path, ignored.matches_ancestry(path))
         elif os.path.isdir(path):
-            for root, dirnames, filenames in os.walk(path):
-                for filename in filenames:
-                    path = os.path.join(root, filename)
-                    if extension_matches(path):
-                        yield (path, path_ignorable(path))
+            if ignored.matches_ancestry(path):
+                yield (path, True)
+                continue
+            if changes is not None:
+                relative_paths = changes.files(path)
+            elif use_git:
+                relative_paths = vcs.git_files(path)
+            else:
+                relative_paths = None
+            if relative_paths is not None:
+                yield from listed(path, relative_paths)
+            else:
+                yield from walk(path)
         else:
             raise OSError("Invalid path: %s" % path)
 
@@ -66,6 +268,13 @@ def contains_url(line):
     return "http://" in line or "https://" in line
 
 
+def line_offsets(lines):
+    """Returns the offset at which each of the given lines starts."""
+    offsets = list(itertools.accumulate(map(len, lines), initial=0))
+    offsets.pop()
+    return offsets
+
+
 def has_any_node_type(node, node_types):
     n = node
     while n is not None:
@@ -73,3 +282,62 @@ def has_any_node_type(node, node_types):
             return True
         n = n.parent
     return False
+
+
+class NodeSpanIndex:
+    """Finds the nodes with the smallest line span containing a line.
+
+    Built from ``(node, (line_min, line_max))`` pairs, queries are answered
+    by sweeping over the lines, which is amortised logarithmic time when they
+    are made in increasing line order (as the line checks do).
+    """
+
+    def __init__(self, nodes_lines):
+        self._nodes_lines = nodes_lines
+        self._by_start = sorted(
+            range(len(nodes_lines)),
+            key=lambda i: nodes_lines[i][1][0],
+        )
+        self._reset()
+
+    def _reset(self):
+        self._next = 0
+        self._last = None
+        # Entries are (span, position, line_max) of the nodes starting at or
+        # before the last line queried.
+        self._active = []
+
+    def smallest_spanning(self, num):
+        """Returns the nodes (in their original order) spanning ``num``.
+
+        Only the nodes whose span (``line_max - line_min``) is the smallest
+        among the ones containing the line are returned.
+        """
+        if self._last is not None and num < self._last:
+            self._reset()
+        self._last = num
+        nodes_lines = self._nodes_lines
+        active = self._active
+        while self._next < len(self._by_start):
+            i = self._by_start[self._next]
+            line_min, line_max = nodes_lines[i][1]
+            if line_min > num:
+                break
+            heapq.heappush(active, (line_max - line_min, i, line_max))
+            self._next += 1
+        while active:
+            # Nodes ending before this line can not contain any later one.
+            if active[0][2] < num:
+                heapq.heappop(active)
+                continue
+            span = active[0][0]
+            found = []
+            while active and active[0][0] == span:
+                entry = heapq.heappop(active)
+                if entry[2] >= num:
+                    found.append(entry)
+            if found:
+                for entry in found:
+                    heapq.heappush(active, entry)
+                return [nodes_lines[i][0] for _span, i, _line_max in found]
+        return []
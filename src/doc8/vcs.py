@@ -0,0 +1,211 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Discovery of files (and their changes) from the local git repository."""
+
+import logging
+import os
+import re
+import subprocess  # noqa: S404
+
+LOG = logging.getLogger(__name__)
+
+GIT = (
+    "git",
+    # Never run a file system monitor configured by the repository.
+    "-c",
+    "core.fsmonitor=false",
+    "-c",
+    "core.quotepath=off",
+)
+GIT_LS_FILES = (*GIT, "ls-files", "-z", "--cached", "--others", "--exclude-standard")
+GIT_LS_UNTRACKED = (*GIT, "ls-files", "-z", "--others", "--exclude-standard")
+GIT_DIFF = (
+    *GIT,
+    "diff",
+    "--unified=0",
+    "--no-color",
+    "--no-ext-diff",
+    "--no-textconv",
+    "--relative",
+    "--src-prefix=a/",
+    "--dst-prefix=b/",
+)
+
+HUNK_REGEX = re.compile(
+    rb"^@@ -\d+(?:,(?P<old_count>\d+))? \+(?P<start>\d+)(?:,(?P<count>\d+))? @@",
+)
+QUOTED_REGEX = re.compile(rb"\\([0-7]{3}|.)")
+QUOTED_CHARACTERS = {
+    b"a": b"\a",
+    b"b": b"\b",
+    b"f": b"\f",
+    b"n": b"\n",
+    b"r": b"\r",
+    b"t": b"\t",
+    b"v": b"\v",
+}
+
+
+def _run_git(args, directory):
+    try:
+        return subprocess.run(  # noqa: S603
+            args,
+            cwd=directory,
+            capture_output=True,
+            check=False,
+        )
+    except OSError as e:
+        LOG.debug("Unable to run git in %s: %s", directory, e)
+        return None
+
+
+def _split_files(output):
+    files = []
+    for path in output.split(b"\0"):
+        # Unmerged paths are listed once for each of their stages.
+        if path and (not files or files[-1] != path):
+            files.append(path)
+    return [os.fsdecode(path).replace("/", os.sep) for path in files]
+
+
+def git_files(directory):
+    """Returns the files of the git repository found under ``directory``.
+
+    Those are the files in the index along with the untracked files that
+    are not ignored (by ``.gitignore`` and the other exclude files), as paths
+    relative to ``directory``. ``None`` is returned when ``directory`` is not
+    part of a git repository (or git is not available).
+    """
+    proc = _run_git(GIT_LS_FILES, directory)
+    if proc is None:
+        return None
+    if proc.returncode != 0:
+        LOG.debug(
+            "Unable to list the git files of %s: %s",
+            directory,
+            os.fsdecode(proc.stderr).strip(),
+        )
+        return None
+    return _split_files(proc.stdout)
+
+
+def _unquote(path):
+    # Paths with special characters are quoted (C style) by git.
+    if not path.startswith(b'"'):
+        return path
+
+    def unescape(match):
+        escaped = match.group(1)
+        if escaped.isdigit():
+            return bytes([int(escaped, 8)])
+        return QUOTED_CHARACTERS.get(escaped, escaped)
+
+    return QUOTED_REGEX.sub(unescape, path[1:-1])
+
+
+def parse_diff(diff):
+    """Returns the lines added by a (zero context) diff for each file.
+
+    The result maps the path of the files to a sorted list of ``(start,
+    end)`` ranges of (inclusive, 1-based) line numbers.
+    """
+    changes = {}
+    lines = None
+    # The lines of the current hunk not read yet (removed and added ones),
+    # which may look like file headers.
+    pending = 0
+    for line in diff.splitlines():
+        if pending:
+            if line.startswith((b"-", b"+")):
+                pending -= 1
+            continue
+        if line.startswith(b"+++ "):
+            path = _unquote(line[4:].rstrip(b"\t"))
+            if path.startswith(b"b/"):
+                path = os.fsdecode(path[2:]).replace("/", os.sep)
+                lines = changes.setdefault(path, [])
+            else:
+                # Deleted file.
+                lines = None
+            continue
+        match = HUNK_REGEX.match(line)
+        if match is None:
+            continue
+        old_count = match.group("old_count")
+        start = int(match.group("start"))
+        count = 1 if match.group("count") is None else int(match.group("count"))
+        pending = count + (1 if old_count is None else int(old_count))
+        if count and lines is not None:
+            lines.append((start, start + count - 1))
+    for lines in changes.values():
+        lines.sort()
+    return changes
+
+
+class GitChanges:
+    """Files (and lines) changed in git repositories since a reference.
+
+    Untracked files (that git does not ignore) are considered as changed
+    entirely. The changes of a directory are found with a single ``git
+    diff`` (and ``git ls-files``) call.
+    """
+
+    def __init__(self, ref):
+        if not ref or ref.startswith("-"):
+            raise ValueError("Invalid git reference: %r" % ref)
+        self._ref = ref
+        self._directories = {}
+        # Absolute path of the changed files to their changed lines (or
+        # ``None`` when all their lines are new).
+        self._changes = {}
+
+    def files(self, directory):
+        """Returns the changed files under ``directory`` (relative to it)."""
+        abs_directory = os.path.abspath(directory)
+        try:
+            return self._directories[abs_directory]
+        except KeyError:
+            pass
+        diff = _run_git((*GIT_DIFF, self._ref, "--"), directory)
+        untracked = _run_git(GIT_LS_UNTRACKED, directory)
+        for proc in (diff, untracked):
+            if proc is None or proc.returncode != 0:
+                reason = "git is not available"
+                if proc is not None:
+                    reason = os.fsdecode(proc.stderr).strip()
+                raise ValueError(
+                    "Unable to find the changes of %s since %s: %s"
+                    % (directory, self._ref, reason),
+                )
+        changes = parse_diff(diff.stdout)
+        for path in _split_files(untracked.stdout):
+            changes[path] = None
+        for path, lines in changes.items():
+            self._changes[os.path.join(abs_directory, path)] = lines
+        files = sorted(changes)
+        self._directories[abs_directory] = files
+        return files
+
+    def __contains__(self, path):
+        path = os.path.abspath(path)
+        self.files(os.path.dirname(path))
+        return path in self._changes
+
+    def lines(self, path):
+        """Returns the changed line ranges of ``path``.
+
+        ``None`` is returned when all the lines of the file changed.
+        """
+        path = os.path.abspath(path)
+        self.files(os.path.dirname(path))
+        return self._changes.get(path, [])
@@ -0,0 +1,240 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Notification of the files changing under the validated paths.
+
+On Linux changes are reported by inotify (through ``ctypes``), elsewhere
+(or when inotify can not be used) the files are polled for changes of their
+modification time instead.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import time
+
+from doc8 import utils
+
+LOG = logging.getLogger(__name__)
+
+# Seconds between two polls of the files.
+POLL_INTERVAL = 1.0
+# Seconds to wait for more events once one was received, so that the files
+# written by a single save are reported together.
+SETTLE_DELAY = 0.05
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """Finds the changed files by comparing their status between polls.
+
+    ``list_files`` is called (without arguments) on every poll and returns
+    the paths of the files to watch.
+    """
+
+    def __init__(self, list_files, interval=POLL_INTERVAL):
+        self._list_files = list_files
+        self._interval = interval
+        self._snapshot = self._take_snapshot()
+
+    def _take_snapshot(self):
+        snapshot = {}
+        for path in self._list_files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        return snapshot
+
+    def wait(self):
+        """Blocks until files changed and returns their paths."""
+        while True:
+            time.sleep(self._interval)
+            snapshot = self._take_snapshot()
+            changed = {
+                path
+                for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            if changed:
+                return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Reports the changes of the (not ignored) directories under ``paths``.
+
+    The paths of the files (and directories) that changed are reported, or
+    ``None`` when events were lost and everything has to be checked again.
+    """
+
+    def __init__(self, libc, paths, ignored_paths):
+        self._libc = libc
+        self._ignored = utils.PathMatcher(ignored_paths)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            e = ctypes.get_errno()
+            raise OSError(e, os.strerror(e))
+        self._directories = {}
+        try:
+            for path in paths:
+                if os.path.isdir(path):
+                    self._add_tree(path)
+                else:
+                    self._add_directory(os.path.dirname(path) or os.curdir)
+        except BaseException:
+            self.close()
+            raise
+
+    def _add_directory(self, path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            e = ctypes.get_errno()
+            if e in {errno.ENOENT, errno.ENOTDIR}:
+                # Removed before it could be watched.
+                return
+            raise OSError(e, os.strerror(e), path)
+        self._directories[wd] = path
+
+    def _add_tree(self, top):
+        # Directories are watched in the same way ``find_files`` walks them,
+        # ignored ones (and links to directories) are skipped.
+        stack = [top]
+        while stack:
+            path = stack.pop()
+            self._add_directory(path)
+            try:
+                with os.scandir(path) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if is_dir and not self._ignored.matches(os.path.abspath(entry.path)):
+                    stack.append(entry.path)
+
+    def _read_events(self):
+        changed = set()
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            directory = self._directories.get(wd)
+            if mask & IN_IGNORED:
+                self._directories.pop(wd, None)
+                continue
+            if directory is None:
+                continue
+            if not name:
+                # The watched directory itself was removed (or moved).
+                changed.add(directory)
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                if not self._ignored.matches(os.path.abspath(path)):
+                    self._add_tree(path)
+            changed.add(path)
+        return changed
+
+    def wait(self):
+        """Blocks until files changed and returns their paths."""
+        changed = set()
+        timeout = None
+        while True:
+            readable, _w, _x = select.select([self._fd], [], [], timeout)
+            if not readable:
+                if changed:
+                    return changed
+                continue
+            events = self._read_events()
+            if events is None:
+                return None
+            changed.update(events)
+            timeout = SETTLE_DELAY
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, "inotify_init1"):
+        return None
+    return libc
+
+
+def watcher(paths, ignored_paths, list_files):
+    """Returns the best available watcher of the files under ``paths``.
+
+    ``list_files`` lists the files to watch when they have to be polled.
+    """
+    libc = _load_libc()
+    if libc is not None:
+        try:
+            return InotifyWatcher(libc, paths, ignored_paths)
+        except OSError as e:
+            LOG.debug("Unable to use inotify, polling instead: %s", e)
+    return PollingWatcher(list_files)